@@ -2,6 +2,10 @@ import itertools
 import random
 from typing import *
 
+import numpy as np
+
+from probability import frontier_probabilities, least_risky
+
 
 class Minesweeper():
     """
@@ -16,18 +20,30 @@ class Minesweeper():
         self.mines_found: Set[Tuple[int, int]] = set()
 
         # Initialize an empty field with no mines
-        self.board: List[List[bool]] = []
-        for i in range(self.height):
-            row = [False] * self.width
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.board = np.zeros((height, width), dtype=bool)
+
+        # Add mines randomly, sampling distinct cells without replacement
+        cells = random.sample(range(height * width), mines)
+        self.board.flat[cells] = True
+        self.mines.update(divmod(index, width) for index in cells)
+
+        # Count every cell's neighboring mines once, by summing the eight
+        # shifted copies of the zero-padded board
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+
+        # Keep track of which cells have been revealed, in a flat buffer with
+        # a border of cells marked as revealed so flood fill needs no bounds checks
+        self._stride = width + 2
+        self._seen = bytearray((height + 2) * self._stride)
+        seen = np.frombuffer(self._seen, dtype=bool).reshape(height + 2, self._stride)
+        seen[0, :] = seen[-1, :] = seen[:, 0] = seen[:, -1] = True
+        self.revealed = seen[1:-1, 1:-1]
+        self._flat_counts = np.pad(self.counts, 1).tobytes()
 
     def print(self):
         """
@@ -36,7 +52,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i, j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -45,30 +61,51 @@ class Minesweeper():
 
     def is_mine(self, cell: Tuple[int, int]):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell: Tuple[int, int]):
         """
         Returns the number of mines that are within one row and column of a given cell, not including the cell itself.
         """
+        i, j = cell
+        return int(self.counts[i, j])
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def reveal(self, cell: Tuple[int, int]):
+        """
+        Reveals a safe cell and returns the list of newly revealed cells.
+        If the cell has no nearby mines, its neighbors are revealed as well,
+        flooding outwards until cells with nearby mines are reached.
+        """
+        i, j = cell
+        if self.board[i, j] or self.revealed[i, j]:
+            return []
+
+        stride = self._stride
+        seen = self._seen
+        counts = self._flat_counts
+        offsets = (-stride - 1, -stride, -stride + 1, -1, 1, stride - 1, stride, stride + 1)
+
+        start = (i + 1) * stride + j + 1
+        seen[start] = 1
+        revealed = [start]
+        frontier = [start]
+        while frontier:
+            index = frontier.pop()
+            if counts[index]:
+                continue
+            for offset in offsets:
+                neighbor = index + offset
+                if not seen[neighbor]:
+                    seen[neighbor] = 1
+                    revealed.append(neighbor)
+                    frontier.append(neighbor)
+
+        # Convert flat padded indices back to cells
+        revealed = np.array(revealed)
+        return list(zip(
+            (revealed // stride - 1).tolist(),
+            (revealed % stride - 1).tolist()
+        ))
 
     def won(self):
         """
@@ -139,12 +176,18 @@ class MinesweeperAI():
     Minesweeper game player.
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, used to weigh guesses
+        self.total_mines = mines
+
+        # Enumerated frontier components, reused between guesses
+        self.probability_cache = {}
+
         # Keep track of which cells have been clicked on
         self.moves_made: Set[Tuple[int, int]] = set()
 
@@ -152,15 +195,62 @@ class MinesweeperAI():
         self.mines: Set[Tuple[int, int]] = set()
         self.safes: Set[Tuple[int, int]] = set()
 
+        # Cells known to be safe that have not been clicked on yet
+        self.pending: Set[Tuple[int, int]] = set()
+
         # List of sentences about the game known to be true
         self.knowledge: List[Sentence] = []
 
+        # Cells neither clicked on nor known to be safe or mines, kept in a
+        # list with an index so they can be removed and sampled in O(1)
+        self.undetermined: List[Tuple[int, int]] = [
+            (i, j) for i in range(height) for j in range(width)
+        ]
+        self.undetermined_index: Dict[Tuple[int, int], int] = {
+            cell: index for index, cell in enumerate(self.undetermined)
+        }
+
+        # Undetermined cells next to a cell that has been clicked on
+        self.frontier: Set[Tuple[int, int]] = set()
+
+        # Undetermined cells not on the frontier, kept like the undetermined
+        # cells so a guess away from the frontier is sampled in O(1)
+        self.outside: List[Tuple[int, int]] = list(self.undetermined)
+        self.outside_index: Dict[Tuple[int, int], int] = dict(self.undetermined_index)
+
+    @staticmethod
+    def swap_remove(cells: List[Tuple[int, int]], index: Dict[Tuple[int, int], int], cell: Tuple[int, int]):
+        """
+        Removes a cell from a list of cells and its index of positions, by
+        swapping it with the last cell. Does nothing if the cell is absent.
+        """
+
+        position = index.pop(cell, None)
+        if position is None:
+            return
+
+        last = cells.pop()
+        if last != cell:
+            cells[position] = last
+            index[last] = position
+
+    def determine(self, cell: Tuple[int, int]):
+        """
+        Removes a cell from the undetermined cells, the frontier and the
+        cells outside it.
+        """
+
+        self.swap_remove(self.undetermined, self.undetermined_index, cell)
+        self.swap_remove(self.outside, self.outside_index, cell)
+        self.frontier.discard(cell)
+
     def mark_mine(self, cell: Tuple[int, int]):
         """
         Marks a cell as a mine, and updates all knowledge to mark that cell as a mine as well.
         """
 
         self.mines.add(cell)
+        self.determine(cell)
         for sentence in self.knowledge:
             sentence.mark_mine(cell)
 
@@ -170,6 +260,9 @@ class MinesweeperAI():
         """
 
         self.safes.add(cell)
+        if cell not in self.moves_made:
+            self.pending.add(cell)
+        self.determine(cell)
         for sentence in self.knowledge:
             sentence.mark_safe(cell)
 
@@ -220,6 +313,7 @@ class MinesweeperAI():
 
         self.moves_made.add(cell)
         self.mark_safe(cell)
+        self.pending.discard(cell)
 
         # add a new sentence to the AI's knowledge base based on the value of `cell` and `count`;
         new_sentence_cells = set()
@@ -230,6 +324,9 @@ class MinesweeperAI():
 
                 if 0 <= i < self.height and 0 <= j < self.width:
                     new_sentence_cells.add((i, j))
+                    if (i, j) in self.undetermined_index:
+                        self.frontier.add((i, j))
+                        self.swap_remove(self.outside, self.outside_index, (i, j))
 
         new_sentence = Sentence(new_sentence_cells, count)
 
@@ -257,6 +354,9 @@ class MinesweeperAI():
         for cell in new_safes:
             self.mark_safe(cell)
 
+        # drop sentences whose cells have all been determined
+        self.knowledge = [sentence for sentence in self.knowledge if sentence.cells]
+
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -267,25 +367,43 @@ class MinesweeperAI():
         and self.moves_made, but should not modify any of those values.
         """
 
-        available = self.safes.difference(self.moves_made)
-        if len(available) > 0:
-            return available.pop()
+        # safe cells not yet clicked on are kept as they are found
+        if len(self.pending) > 0:
+            return self.pending.pop()
         return None
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
+        Chooses the cell least likely to be a mine among cells that have not
+        already been chosen and are not known to be mines.
         """
 
-        # Should choose randomly among cells that: have not already been chosen, and are not known to be mines
-        available: Set[Tuple[int, int]] = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                available.add((i, j))
+        # a cell known to be safe, but not yet chosen, is never a risk
+        if len(self.pending) > 0:
+            return self.pending.pop()
+        if len(self.undetermined) == 0:
+            return None
 
-        available.difference_update(self.moves_made)
-        available.difference_update(self.mines)
+        # with nothing revealed next to an undetermined cell, there are no
+        # constraints and any cell is as good as another
+        if len(self.frontier) == 0:
+            return random.choice(self.outside)
 
-        if len(available) > 0:
-            return random.choice(tuple(available))
-        return None
+        # strip cells already known to be safe or mines from the knowledge
+        constraints = []
+        for sentence in self.knowledge:
+            cells = {cell for cell in sentence.cells if cell in self.undetermined_index}
+            constraints.append((cells, sentence.count - len(sentence.cells & self.mines)))
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.mines)
+
+        probabilities, other = frontier_probabilities(
+            constraints, len(self.undetermined), mines_left, self.probability_cache
+        )
+        if probabilities and (other is None or min(probabilities.values()) <= other):
+            return least_risky(probabilities)
+
+        # any cell off the frontier is as good as another
+        return random.choice(self.outside)
@@ -0,0 +1,320 @@
+import math
+import random
+from typing import *
+
+Cell = Tuple[int, int]
+Constraint = Tuple[FrozenSet[Cell], int]
+
+
+def frontier_probabilities(constraints: Iterable[Tuple[Set[Cell], int]], unknown: int, mines_left: Optional[int] = None, cache: Optional[dict] = None):
+    """
+    Return a pair (probabilities, other): a dictionary mapping every cell in
+    `constraints` to the probability that it is a mine, and the probability
+    that any one of the remaining unconstrained cells is a mine (None if
+    there are none). `constraints` must only contain undetermined cells, of
+    which there are `unknown` in total.
+
+    The constrained cells (the frontier) are split into independent
+    components, each component's consistent assignments are counted exactly,
+    and the counts are combined with the number of ways of placing the
+    remaining mines among the unconstrained cells.
+
+    `cache`, if given, maps components to their enumeration and is reused
+    between calls; components that are no longer present are dropped from it.
+    """
+    # only keep distinct, non-empty constraints
+    distinct: Set[Constraint] = set()
+    for cells, count in constraints:
+        if cells:
+            distinct.add((frozenset(cells), count))
+
+    components = _components(distinct)
+    frontier = set().union(*(cells for cells, _ in distinct))
+    rest = unknown - len(frontier)
+
+    # count the consistent assignments of every component, reusing earlier ones
+    enumerations = []
+    used = {}
+    for component in components:
+        key = frozenset(component)
+        if cache is not None and key in cache:
+            enumeration = cache[key]
+        else:
+            enumeration = _enumerate(component)
+        used[key] = enumeration
+        enumerations.append(enumeration)
+    if cache is not None:
+        cache.clear()
+        cache.update(used)
+
+    result = _combine(enumerations, rest, mines_left)
+    if result is None:
+        # knowledge is inconsistent with the mine count, fall back to uniform
+        density = 0.5 if mines_left is None else max(0, min(1, mines_left / unknown))
+        return {cell: density for cell in frontier}, density if rest else None
+    return result
+
+
+def least_risky(probabilities: Dict[Cell, float]):
+    """
+    Return the cell with the lowest probability of being a mine, choosing
+    randomly among ties. Return None if there are no cells.
+    """
+    if not probabilities:
+        return None
+    lowest = min(probabilities.values())
+    return random.choice([
+        cell for cell, p in probabilities.items()
+        if p - lowest < 1e-12
+    ])
+
+
+def _components(constraints: Set[Constraint]):
+    """
+    Split constraints into groups that share no cells with each other.
+    Return a list of lists of constraints.
+    """
+    by_cell: Dict[Cell, List[Constraint]] = {}
+    for constraint in constraints:
+        for cell in constraint[0]:
+            by_cell.setdefault(cell, []).append(constraint)
+
+    components = []
+    seen: Set[Constraint] = set()
+    for constraint in constraints:
+        if constraint in seen:
+            continue
+        seen.add(constraint)
+        component = []
+        stack = [constraint]
+        while stack:
+            current = stack.pop()
+            component.append(current)
+            for cell in current[0]:
+                for neighbor in by_cell[cell]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        stack.append(neighbor)
+        components.append(component)
+    return components
+
+
+def _order(constraints: List[Constraint]):
+    """
+    Return the cells of a component in breadth-first order, starting from a
+    cell in the fewest constraints, so that constraints are closed soon after
+    they are opened.
+    """
+    by_cell: Dict[Cell, List[Constraint]] = {}
+    for constraint in constraints:
+        for cell in constraint[0]:
+            by_cell.setdefault(cell, []).append(constraint)
+
+    start = min(by_cell, key=lambda cell: (len(by_cell[cell]), cell))
+    order = [start]
+    seen = {start}
+    for cell in order:
+        for constraint in by_cell[cell]:
+            for neighbor in sorted(constraint[0]):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    order.append(neighbor)
+    return order
+
+
+def _enumerate(constraints: List[Constraint]):
+    """
+    Count the mine assignments of a component that satisfy all its constraints.
+
+    Return a pair (cells, table), where `table` maps a number of mines k to a
+    pair (ways, counts): the number of assignments with k mines, and for each
+    cell the number of those assignments in which it is a mine.
+    """
+    cells = _order(constraints)
+    n = len(cells)
+    index = {cell: i for i, cell in enumerate(cells)}
+
+    # for every position, the constraints it belongs to and how many of their
+    # cells come after it; and for every position, the constraints that are
+    # partially decided when it is reached
+    members: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+    active: List[List[int]] = [[] for _ in range(n)]
+    for j, (constraint_cells, _) in enumerate(constraints):
+        positions = sorted(index[cell] for cell in constraint_cells)
+        for k, position in enumerate(positions):
+            members[position].append((j, len(positions) - k - 1))
+        for position in range(positions[0] + 1, positions[-1] + 1):
+            active[position].append(j)
+
+    residual = [count for _, count in constraints]
+    memo: Dict[Tuple[int, Tuple[int, ...]], Dict[int, Tuple[int, List[int]]]] = {}
+
+    def allowed(i, mine):
+        # a constraint must not be exceeded, and must still be reachable
+        return all(
+            0 <= residual[j] - mine <= after
+            for j, after in members[i]
+        )
+
+    # depth-first search over the cells, with an explicit stack of frames
+    # [position, memo key, mine choice, table] so that large components
+    # do not exhaust the recursion limit; `result` is the table of the
+    # frame that finished last
+    result: Dict[int, Tuple[int, List[int]]] = {}
+    stack = [[0, None, -1, {}]]
+    while stack:
+        frame = stack[-1]
+        i, key, mine, table = frame
+
+        if mine == -1:
+            if i == n:
+                result = {0: (1, [])}
+                stack.pop()
+                continue
+
+            # the rest of the search only depends on the still-open constraints
+            key = (i, tuple(residual[j] for j in active[i]))
+            if key in memo:
+                result = memo[key]
+                stack.pop()
+                continue
+            frame[1] = key
+        else:
+            # the search below position i has finished for this choice
+            for j, _ in members[i]:
+                residual[j] += mine
+            for k, (ways, counts) in result.items():
+                counts = [ways if mine else 0] + counts
+                if k + mine in table:
+                    prev_ways, prev_counts = table[k + mine]
+                    table[k + mine] = (
+                        prev_ways + ways,
+                        [a + b for a, b in zip(prev_counts, counts)]
+                    )
+                else:
+                    table[k + mine] = (ways, counts)
+
+        # move on to the next allowed choice, or finish this position
+        mine += 1
+        while mine <= 1 and not allowed(i, mine):
+            mine += 1
+        frame[2] = mine
+        if mine > 1:
+            memo[key] = table
+            result = table
+            stack.pop()
+            continue
+
+        for j, _ in members[i]:
+            residual[j] -= mine
+        stack.append([i + 1, None, -1, {}])
+
+    return cells, result
+
+
+def _convolve(a: List[int], b: List[int]):
+    """
+    Return the convolution of two lists of counts indexed by number of mines.
+    """
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def _combine(enumerations, rest: int, mines_left: Optional[int]):
+    """
+    Combine component enumerations into per-cell mine probabilities for the
+    frontier, and the probability for each of the `rest` unconstrained cells.
+    Return None if no assignment is consistent.
+    """
+    # number of ways per number of mines, for each component
+    polynomials = []
+    for _, table in enumerations:
+        if not table:
+            return None
+        polynomial = [0] * (max(table) + 1)
+        for k, (ways, _) in table.items():
+            polynomial[k] = ways
+        polynomials.append(polynomial)
+
+    probabilities: Dict[Cell, float] = {}
+
+    if mines_left is None:
+        # without a global mine count, every assignment of a component is equally likely
+        expected = 0
+        frontier_size = 0
+        for cells, table in enumerations:
+            total = sum(ways for ways, _ in table.values())
+            mines = [0] * len(cells)
+            for ways, counts in table.values():
+                mines = [a + b for a, b in zip(mines, counts)]
+            for cell, m in zip(cells, mines):
+                probabilities[cell] = m / total
+            expected += sum(mines) / total
+            frontier_size += len(cells)
+        density = expected / frontier_size if frontier_size else 0.5
+        return probabilities, density if rest else None
+
+    # prefix and suffix convolutions, so each component can see all others
+    prefix = [[1]]
+    for polynomial in polynomials:
+        prefix.append(_convolve(prefix[-1], polynomial))
+    suffix = [[1]]
+    for polynomial in reversed(polynomials):
+        suffix.append(_convolve(suffix[-1], polynomial))
+    suffix.reverse()
+    everything = prefix[-1]
+
+    # weights of placing the remaining x mines among the unconstrained cells,
+    # relative to the largest; only the x left over by a possible number of
+    # frontier mines are needed, so the cost does not grow with mines_left
+    logs = {
+        mines_left - k: _log_comb(rest, mines_left - k)
+        for k, ways in enumerate(everything)
+        if ways and 0 <= mines_left - k <= rest
+    }
+    if not logs:
+        return None
+    top = max(logs.values())
+    placements = {x: math.exp(value - top) for x, value in logs.items()}
+
+    def outside(x):
+        return placements.get(x, 0.0)
+
+    # counts can be too large for floats, so they are scaled by the largest
+    # before being weighted
+    scale = max(everything)
+    total = sum(ways / scale * outside(mines_left - k) for k, ways in enumerate(everything))
+    if total == 0:
+        return None
+
+    for a, (cells, table) in enumerate(enumerations):
+        others = _convolve(prefix[a], suffix[a + 1])
+        largest = max(others)
+        for k, (_, counts) in table.items():
+            weight = sum(
+                ways / largest * outside(mines_left - k - other)
+                for other, ways in enumerate(others)
+            )
+            for cell, count in zip(cells, counts):
+                probabilities[cell] = probabilities.get(cell, 0) + count * largest / scale * weight
+        for cell in cells:
+            probabilities[cell] = probabilities.get(cell, 0) / total
+
+    if not rest:
+        return probabilities, None
+    expected = sum(
+        ways / scale * outside(mines_left - k) * (mines_left - k)
+        for k, ways in enumerate(everything)
+    )
+    return probabilities, expected / (rest * total)
+
+
+def _log_comb(n: int, k: int):
+    """
+    Return the natural logarithm of the binomial coefficient n choose k.
+    """
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import *
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+GAMES = 1000
+SIZES = ["8x8", "16x16", "16x30"]
+DENSITIES = [0.125, 0.156, 0.206]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games headlessly with the AI and report statistics as JSON."
+    )
+    parser.add_argument("-n", "--games", type=int, default=GAMES,
+                        help="number of games per configuration")
+    parser.add_argument("-s", "--sizes", nargs="+", default=SIZES,
+                        help="board sizes as HEIGHTxWIDTH")
+    parser.add_argument("-d", "--densities", nargs="+", type=float, default=DENSITIES,
+                        help="fractions of cells that are mines")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game k uses seed + k")
+    parser.add_argument("-o", "--output",
+                        help="file to write the JSON report to, instead of stdout")
+    args = parser.parse_args()
+    if args.games < 1:
+        sys.exit("Number of games must be positive")
+
+    configurations = []
+    for size in args.sizes:
+        try:
+            height, width = (int(x) for x in size.lower().split("x"))
+        except ValueError:
+            sys.exit(f"Invalid board size: {size}")
+        for density in args.densities:
+            mines = max(1, round(height * width * density))
+            if mines >= height * width:
+                sys.exit(f"Too many mines for a {size} board: {mines}")
+            configurations.append((height, width, mines))
+
+    report = {
+        "games": args.games,
+        "processes": args.processes,
+        "seed": args.seed,
+        "results": [
+            simulate(height, width, mines, args.games, args.processes, args.seed)
+            for height, width, mines in configurations
+        ]
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def play(height, width, mines, seed):
+    """
+    Play a single game with the AI, making safe moves when it knows of any
+    and guessing otherwise, and return a dictionary of statistics about it.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+
+    safe_cells = height * width - mines
+    moves = 0
+    guesses = 0
+    inference = 0
+    max_knowledge = 0
+    won = False
+    start = time.perf_counter()
+
+    while True:
+
+        # Time choosing the move
+        tic = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is not None:
+                guesses += 1
+        inference += time.perf_counter() - tic
+        if move is None or game.is_mine(move):
+            break
+
+        # Reveal the move on the board, then time updating the knowledge base
+        counts = [(cell, game.nearby_mines(cell)) for cell in game.reveal(move)]
+        tic = time.perf_counter()
+        for cell, count in counts:
+            ai.add_knowledge(cell, count)
+        inference += time.perf_counter() - tic
+
+        moves += 1
+        max_knowledge = max(max_knowledge, len(ai.knowledge))
+        if len(ai.moves_made) == safe_cells:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": moves,
+        "guesses": guesses,
+        "seconds": time.perf_counter() - start,
+        "inference_seconds": inference,
+        "max_knowledge": max_knowledge
+    }
+
+
+def _play(arguments):
+    return play(*arguments)
+
+
+def simulate(height, width, mines, games, processes=1, seed=0):
+    """
+    Play `games` games on a `height` x `width` board with `mines` mines,
+    optionally spread across `processes` worker processes, and return a
+    dictionary summarizing them.
+    """
+    tasks = [(height, width, mines, seed + k) for k in range(games)]
+    start = time.perf_counter()
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_play, tasks, chunksize=max(1, games // (processes * 4))))
+    else:
+        results = [_play(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+
+    moves = sum(result["moves"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    inference = sum(result["inference_seconds"] for result in results)
+    return {
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "games": games,
+        "win_rate": sum(result["won"] for result in results) / games,
+        "moves": moves,
+        "guesses": sum(result["guesses"] for result in results),
+        "moves_per_second": moves / seconds if seconds else None,
+        "inference_ms_per_move": 1000 * inference / moves if moves else None,
+        "mean_max_knowledge": sum(result["max_knowledge"] for result in results) / games,
+        "max_knowledge": max(result["max_knowledge"] for result in results),
+        "wall_seconds": elapsed
+    }
+
+
+if __name__ == "__main__":
+    main()
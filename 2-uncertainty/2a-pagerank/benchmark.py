@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import crawler
+from instrument import Monitor
+from linkgraph import LinkGraph
+from sampling import surf
+from solvers import SOLVERS, TOLERANCE, solve
+
+PAGES = 10000
+LINKS = 8
+EXPONENT = 2.1
+DAMPING = 0.85
+SAMPLES = 1000000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark PageRank on a synthetic power-law corpus and report JSON."
+    )
+    parser.add_argument("directory", help="corpus directory, generated if it has no HTML files")
+    parser.add_argument("--pages", type=int, default=PAGES, help="number of pages to generate")
+    parser.add_argument("--links", type=float, default=LINKS, help="mean number of links per page")
+    parser.add_argument("--exponent", type=float, default=EXPONENT,
+                        help="power-law exponent of link counts and page popularity (> 2)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="random surfer samples")
+    parser.add_argument("--methods", nargs="+", default=list(SOLVERS), choices=list(SOLVERS),
+                        help="solvers to run")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="L1 stopping tolerance")
+    parser.add_argument("--output", help="file to write the JSON report to, instead of stdout")
+    args = parser.parse_args()
+    if args.exponent <= 2:
+        sys.exit("Exponent must be greater than 2")
+
+    report = {}
+    if not os.path.isdir(args.directory) or not any(
+        name.endswith(".html") for name in os.listdir(args.directory)
+    ):
+        start = time.perf_counter()
+        generate(args.directory, args.pages, args.links, args.exponent, args.seed)
+        report["generate_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = LinkGraph.from_corpus(crawler.crawl(args.directory))
+    report["crawl_seconds"] = time.perf_counter() - start
+    report["pages"] = len(graph)
+    report["links"] = len(graph.indices)
+
+    monitor = Monitor()
+    surf(graph, DAMPING, args.samples, rng=args.seed, monitor=monitor)
+    for method in args.methods:
+        solve(graph, DAMPING, method, tolerance=args.tolerance, monitor=monitor)
+    report.update(json.loads(monitor.to_json()))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def generate(directory, pages, links=LINKS, exponent=EXPONENT, seed=None):
+    """
+    Write a synthetic corpus of `pages` HTML files to `directory`, in the
+    format `crawl` reads. Both the number of links on a page and how often a
+    page is linked to follow power laws with the given `exponent`, and the
+    mean number of links per page is about `links`.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Pareto-distributed link counts with the requested mean
+    shape = exponent - 1
+    smallest = links * (shape - 1) / shape
+    degrees = np.minimum(
+        (rng.pareto(shape, pages) + 1) * smallest, pages - 1
+    ).round().astype(np.int64)
+
+    # Zipf-like popularity, shuffled so popular pages are spread out
+    popularity = np.arange(1, pages + 1) ** (-1 / shape)
+    popularity = popularity[rng.permutation(pages)]
+    targets = rng.choice(pages, size=int(degrees.sum()), p=popularity / popularity.sum())
+
+    offset = 0
+    for page, degree in enumerate(degrees.tolist()):
+        linked = targets[offset:offset + degree].tolist()
+        offset += degree
+        with open(os.path.join(directory, f"{page}.html"), "w") as f:
+            f.write("<!DOCTYPE html>\n<html>\n<body>\n")
+            for target in sorted(set(linked) - {page}):
+                f.write(f'<a href="{target}.html">{target}</a>\n')
+            f.write("</body>\n</html>\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import itertools
+import os
+import re
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from linkgraph import LinkGraph
+
+CHUNK_SIZE = 1 << 16
+
+# Batches of files parsed per task, and tasks in flight per worker
+BATCH = 64
+WINDOW = 4
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of links in the HTML file at `path`, reading it in
+    chunks of `chunk_size` characters so the file is never held in memory.
+    """
+    links = set()
+    tail = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = tail + chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+            if not chunk:
+                return links
+
+            # keep an unfinished tag, which may be completed by the next chunk
+            start = buffer.find("<", max(end, buffer.rfind(">") + 1))
+            tail = buffer[start:] if start != -1 else ""
+
+
+def _parse(task):
+    directory, filename, chunk_size = task
+    links = extract_links(os.path.join(directory, filename), chunk_size)
+    links.discard(filename)
+    return filename, links
+
+
+def _parse_batch(tasks):
+    return [_parse(task) for task in tasks]
+
+
+def _html_files(directory):
+    """
+    Return the sorted names of the HTML files in `directory`.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(entry.name for entry in entries if entry.name.endswith(".html"))
+
+
+def _parse_all(directory, workers=None, processes=False, chunk_size=CHUNK_SIZE, filenames=None):
+    """
+    Parse every HTML file in `directory` (or only `filenames`) across a pool
+    of `workers` threads (or processes) and yield (filename, links) pairs in
+    filename order.
+
+    Files are handed out in batches, and only WINDOW batches per worker are
+    in flight at once, so the links of the whole corpus are never held
+    waiting to be consumed.
+    """
+    if filenames is None:
+        filenames = _html_files(directory)
+    workers = workers or os.cpu_count() or 1
+    size = BATCH if processes else 1
+    tasks = ((directory, filename, chunk_size) for filename in filenames)
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            # keep the window full, then hand back the oldest batch in order
+            while len(pending) < WINDOW * workers:
+                batch = list(itertools.islice(tasks, size))
+                if not batch:
+                    break
+                pending.append(executor.submit(_parse_batch, batch))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def crawl(directory, workers=None, processes=False):
+    """
+    Parse a directory of HTML pages in parallel and return a dictionary
+    mapping each page to the set of other pages in the corpus it links to.
+    """
+    pages = dict(_parse_all(directory, workers, processes))
+
+    # Only include links to other pages in the corpus
+    for filename in pages:
+        pages[filename] = set(
+            link for link in pages[filename]
+            if link in pages
+        )
+
+    return pages
+
+
+def crawl_to_file(directory, path, workers=None, processes=False):
+    """
+    Parse a directory of HTML pages in parallel, writing each page and its
+    links to the edge-list file at `path` as soon as it is parsed, so the
+    link graph is never held in memory. Return the number of pages written.
+
+    Every line of the file is a page followed by the pages it links to,
+    separated by tabs. Links are not yet restricted to pages in the corpus.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for filename, links in _parse_all(directory, workers, processes):
+            links = sorted(link for link in links if "\t" not in link and "\n" not in link)
+            f.write("\t".join([filename] + links) + "\n")
+            count += 1
+    return count
+
+
+def read_edges(path):
+    """
+    Return the dictionary of pages and the pages they link to stored in the
+    edge-list file at `path`, keeping only links to pages in the corpus.
+    """
+    pages = dict()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            page, *links = line.rstrip("\n").split("\t")
+            pages[page] = set(links)
+    for page in pages:
+        pages[page] = set(link for link in pages[page] if link in pages)
+    return pages
+
+
+def read_graph(path):
+    """
+    Return the link graph stored in the edge-list file at `path`, reading the
+    file twice (once for page names, once for links) and building the
+    out-link arrays directly, without a dictionary of sets.
+    """
+    with open(path, encoding="utf-8") as f:
+        pages = [line.split("\t", 1)[0].rstrip("\n") for line in f]
+    index = {page: i for i, page in enumerate(pages)}
+
+    indptr = array("q", [0])
+    indices = array("i")
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            _, *links = line.rstrip("\n").split("\t")
+            indices.extend(sorted(index[link] for link in links if link in index))
+            indptr.append(len(indices))
+
+    return LinkGraph(pages, indptr, indices)
+
+
+def recrawl(directory, path, workers=None, processes=False):
+    """
+    Parse a directory of HTML pages, reusing the crawl saved at `path` (if
+    any) for every file whose modification time and size are unchanged.
+
+    Return a pair (records, ranks): a dictionary mapping each page to a tuple
+    (mtime, size, links) of its current state, and the ranks saved with the
+    previous crawl (empty if there are none).
+    """
+    records, ranks = load_crawl(path) if os.path.exists(path) else ({}, {})
+
+    current = {}
+    changed = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html"):
+                continue
+            stat = entry.stat()
+            previous = records.get(entry.name)
+            if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                current[entry.name] = previous
+            else:
+                current[entry.name] = (stat.st_mtime_ns, stat.st_size, None)
+                changed.append(entry.name)
+
+    for filename, links in _parse_all(directory, workers, processes, filenames=sorted(changed)):
+        mtime, size, _ = current[filename]
+        current[filename] = (mtime, size, links)
+
+    return dict(sorted(current.items())), ranks
+
+
+def records_to_corpus(records):
+    """
+    Return the dictionary mapping each page in `records` to the set of other
+    pages in the corpus it links to.
+    """
+    return {
+        page: set(link for link in links if link in records)
+        for page, (_, _, links) in records.items()
+    }
+
+
+def save_crawl(path, records, ranks=None):
+    """
+    Save `records`, as returned by `recrawl`, and optionally a dictionary of
+    `ranks` to the binary file at `path`. Links are stored as indices into a
+    table of distinct link targets.
+    """
+    pages = list(records)
+    names = sorted(set().union(*(links for _, _, links in records.values())))
+    index = {name: i for i, name in enumerate(names)}
+
+    indptr = array("q", [0])
+    indices = array("i")
+    for _, _, links in records.values():
+        indices.extend(sorted(index[link] for link in links))
+        indptr.append(len(indices))
+
+    ranks = ranks or {}
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        np.savez(
+            f,
+            pages=np.array(pages, dtype=str),
+            mtimes=np.array([records[page][0] for page in pages], dtype=np.int64),
+            sizes=np.array([records[page][1] for page in pages], dtype=np.int64),
+            names=np.array(names, dtype=str),
+            indptr=np.frombuffer(indptr, dtype=np.int64),
+            indices=np.frombuffer(indices, dtype=np.int32),
+            ranks=np.array([ranks.get(page, np.nan) for page in pages], dtype=float)
+        )
+    os.replace(temporary, path)
+
+
+def load_crawl(path):
+    """
+    Load a crawl saved by `save_crawl` and return a pair (records, ranks).
+    """
+    with np.load(path) as data:
+        pages = data["pages"].tolist()
+        names = data["names"].tolist()
+        indptr = data["indptr"].tolist()
+        indices = data["indices"].tolist()
+        records = {
+            page: (int(mtime), int(size), set(names[j] for j in indices[indptr[i]:indptr[i + 1]]))
+            for i, (page, mtime, size) in enumerate(zip(pages, data["mtimes"], data["sizes"]))
+        }
+        ranks = {
+            page: rank
+            for page, rank in zip(pages, data["ranks"].tolist())
+            if rank == rank
+        }
+    return records, ranks
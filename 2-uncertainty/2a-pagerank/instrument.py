@@ -0,0 +1,125 @@
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def memory():
+    """
+    Return the peak resident memory of this process in bytes, or None where
+    it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, other systems kilobytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Monitor():
+    """
+    Records how much work the PageRank solvers and samplers do: for every
+    solver iteration its residual, wall time, edges processed per second and
+    memory, and for every batch of samples its steps per second. Each record
+    is passed to `callback`, if given, as soon as it is made.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.records = []
+        self.label = None
+        self.count = 0
+        self.clock = time.perf_counter()
+
+    def begin(self, label):
+        """
+        Start recording a new run, such as a solver or sampler, named `label`.
+        """
+        self.label = label
+        self.count = 0
+        self.clock = time.perf_counter()
+
+    def _record(self, record):
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def iteration(self, residual, edges):
+        """
+        Record a solver iteration that processed `edges` links and ended
+        with `residual`.
+        """
+        now = time.perf_counter()
+        seconds = now - self.clock
+        self.clock = now
+        self.count += 1
+        self._record({
+            "label": self.label,
+            "kind": "iteration",
+            "iteration": self.count,
+            "residual": residual,
+            "seconds": seconds,
+            "edges": int(edges),
+            "edges_per_second": edges / seconds if seconds > 0 else None,
+            "memory": memory()
+        })
+
+    def sampled(self, steps):
+        """
+        Record a batch of `steps` random surfer steps.
+        """
+        now = time.perf_counter()
+        seconds = now - self.clock
+        self.clock = now
+        self.count += 1
+        self._record({
+            "label": self.label,
+            "kind": "sampling",
+            "batch": self.count,
+            "steps": int(steps),
+            "seconds": seconds,
+            "steps_per_second": steps / seconds if seconds > 0 else None,
+            "memory": memory()
+        })
+
+    def summary(self):
+        """
+        Return a dictionary of totals for every run recorded, by label.
+        """
+        summary = {}
+        for record in self.records:
+            totals = summary.setdefault(record["label"], {
+                "iterations": 0, "edges": 0, "steps": 0, "seconds": 0.0
+            })
+            totals["seconds"] += record["seconds"]
+            if record["kind"] == "iteration":
+                totals["iterations"] += 1
+                totals["edges"] += record["edges"]
+                totals["residual"] = record["residual"]
+            else:
+                totals["steps"] += record["steps"]
+        for totals in summary.values():
+            seconds = totals["seconds"]
+            totals["edges_per_second"] = totals["edges"] / seconds if seconds > 0 else None
+            totals["steps_per_second"] = totals["steps"] / seconds if seconds > 0 else None
+        return summary
+
+    def to_json(self, path=None):
+        """
+        Return the records and their summary as JSON, also writing it to the
+        file at `path` if given.
+        """
+        text = json.dumps({
+            "summary": self.summary(),
+            "records": self.records,
+            "peak_memory": memory()
+        }, indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class LinkGraph():
+    """
+    Link graph of a corpus stored as a compressed sparse row (CSR) matrix of
+    out-links: the pages linked to by page `i` are
+    `indices[indptr[i]:indptr[i + 1]]`.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = list(pages)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.outdegree = np.diff(self.indptr)
+        self.dangling = self.outdegree == 0
+        self.inverse_outdegree = np.zeros(len(self.pages))
+        self.inverse_outdegree[~self.dangling] = 1 / self.outdegree[~self.dangling]
+        self._sources = None
+        self._inlinks = None
+
+    def __len__(self):
+        return len(self.pages)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a link graph from a dictionary mapping each page to the set of
+        pages it links to, as returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        indptr = [0]
+        indices = []
+        for page in pages:
+            indices.extend(sorted(index[link] for link in corpus[page]))
+            indptr.append(len(indices))
+        return cls(pages, indptr, indices)
+
+    def to_corpus(self):
+        """
+        Return the graph as a dictionary mapping each page to the set of
+        pages it links to.
+        """
+        return {
+            page: set(self.pages[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]])
+            for i, page in enumerate(self.pages)
+        }
+
+    @property
+    def sources(self):
+        """
+        Source page of every edge, aligned with `indices`.
+        """
+        if self._sources is None:
+            self._sources = np.repeat(
+                np.arange(len(self.pages), dtype=np.int32), self.outdegree
+            )
+        return self._sources
+
+    @property
+    def inlinks(self):
+        """
+        Pair (inptr, insources): the transposed (in-link) CSR matrix, where
+        the pages linking to page `i` are `insources[inptr[i]:inptr[i + 1]]`.
+        """
+        if self._inlinks is None:
+            order = np.argsort(self.indices, kind="stable")
+            inptr = np.zeros(len(self.pages) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=len(self.pages)), out=inptr[1:])
+            self._inlinks = (inptr, self.sources[order])
+        return self._inlinks
+
+    def to_dict(self, vector):
+        """
+        Return a dictionary mapping each page to its value in `vector`.
+        """
+        return dict(zip(self.pages, np.asarray(vector).tolist()))
@@ -1,25 +1,41 @@
-import os
-import random
-import re
 import sys
 
+import numpy as np
+
+import crawler
+from linkgraph import LinkGraph
+from sampling import surf
+from solvers import solve
+
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python pagerank.py corpus [cache]")
+
+    # With a cache, only re-crawl changed pages and start from the previous ranks
+    cache = sys.argv[2] if len(sys.argv) == 3 else None
+    previous = None
+    if cache:
+        records, previous = crawler.recrawl(sys.argv[1], cache)
+        corpus = crawler.records_to_corpus(records)
+    else:
+        corpus = crawl(sys.argv[1])
+
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    ranks = iterate_pagerank(corpus, DAMPING, previous)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
+    if cache:
+        crawler.save_crawl(cache, records, ranks)
+
 
 def crawl(directory):
     """
@@ -27,25 +43,8 @@ def crawl(directory):
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
-
-    return pages
+    # Extract all links from HTML files, streaming them across a thread pool
+    return crawler.crawl(directory)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -83,84 +82,55 @@ def transition_model(corpus, page, damping_factor):
     return prop_dist
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, monitor=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
+    `monitor`, if given, records how many steps the sampler took.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
 
-    # prepare dictionary with number of samples == 0
-    samples_dict = corpus.copy()
-    for i in samples_dict:
-        samples_dict[i] = 0
-    sample = None
-
-    # itearting n times
-    for _ in range(n):
-        if sample:
-            # previous sample is available, choosing using transition model
-            dist = transition_model(corpus, sample, damping_factor)
-            dist_lst = list(dist.keys())
-            dist_weights = [dist[i] for i in dist]
-            sample = random.choices(dist_lst, dist_weights, k=1)[0]
-        else:
-            # no previous sample, choosing randomly
-            sample = random.choice(list(corpus.keys()))
-
-        # count each sample
-        samples_dict[sample] += 1
+    graph = LinkGraph.from_corpus(corpus)
 
-    # turn sample count to percentage
-    for item in samples_dict:
-        samples_dict[item] /= n
+    # move a batch of surfers together, counting every page they land on
+    counts = surf(graph, damping_factor, n, monitor=monitor)
 
-    return samples_dict
+    # turn sample count to percentage
+    return graph.to_dict(counts / n)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, start=None, method="power", monitor=None):
     """
     Return PageRank values for each page by iteratively updating
-    PageRank values until convergence.
+    PageRank values until convergence, using the solver named `method`
+    ("power", "gauss-seidel", "extrapolation" or "adaptive"; the last only
+    saves work when some pages converge much more slowly than the rest).
+
+    If `start` is given, a dictionary of earlier PageRank values (say,
+    before some pages were edited), iteration starts from those values
+    instead of from a uniform distribution. New pages start at 1/N.
+    `monitor`, if given, records every iteration (see instrument.Monitor).
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pages_number = len(corpus)
-    old_dict = {}
-    new_dict = {}
-
-    # assigning each page a rank of 1/n, where n is total number of pages in the corpus
-    for page in corpus:
-        old_dict[page] = 1 / pages_number
-
-    # repeatedly calculating new rank values basing on all of the current rank values
-    while True:
-        for page in corpus:
-            temp = 0
-            for linking_page in corpus:
-                # check if page links to our page
-                if page in corpus[linking_page]:
-                    temp += (old_dict[linking_page] / len(corpus[linking_page]))
-                # if page has no links, interpret it as having one link for every other page
-                if len(corpus[linking_page]) == 0:
-                    temp += (old_dict[linking_page]) / len(corpus)
-            temp *= damping_factor
-            temp += (1 - damping_factor) / pages_number
-
-            new_dict[page] = temp
-
-        difference = max([abs(new_dict[x] - old_dict[x]) for x in old_dict])
-        if difference < 0.001:
-            break
-        else:
-            old_dict = new_dict.copy()
-
-    return old_dict
+    graph = LinkGraph.from_corpus(corpus)
+
+    # warm start from the previous ranks, renormalized over the current pages
+    initial = None
+    if start:
+        initial = np.array([start.get(page, 1 / len(graph)) for page in graph.pages])
+        initial /= initial.sum()
+
+    # repeatedly calculating new rank values until no rank changes by more than 0.001
+    solution = solve(graph, damping_factor, method, tolerance=0.001, norm="max", start=initial, monitor=monitor)
+
+    return graph.to_dict(solution.ranks)
+
 
 if __name__ == "__main__":
     main()
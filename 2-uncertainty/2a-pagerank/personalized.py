@@ -0,0 +1,119 @@
+from collections import deque
+
+import numpy as np
+
+from solvers import MAX_ITERATIONS, TOLERANCE, Solution
+
+CHUNK = 1 << 22
+PUSH_THRESHOLD = 1e-6
+
+
+def personalization(graph, seeds):
+    """
+    Return the N x k matrix whose column j is the uniform distribution over
+    the pages in the j-th set of `seeds`.
+    """
+    matrix = np.zeros((len(graph), len(seeds)))
+    for j, pages in enumerate(seeds):
+        rows = [graph.index[page] for page in pages]
+        if not rows:
+            raise ValueError(f"Seed set {j} is empty")
+        matrix[rows, j] = 1 / len(rows)
+    return matrix
+
+
+def incoming(graph, shares, chunk=CHUNK):
+    """
+    Return the matrix of rank flowing into every page along links, when
+    every page sends row `i` of `shares` down each of its links. Edges are
+    processed in chunks of about `chunk` matrix entries, grouped by target.
+    """
+    inptr, insources = graph.inlinks
+    result = np.zeros_like(shares)
+    receivers = np.flatnonzero(np.diff(inptr))
+    if len(receivers) == 0:
+        return result
+    starts = inptr[receivers]
+    edges_per_chunk = max(1, chunk // shares.shape[1])
+
+    i = 0
+    while i < len(receivers):
+        j = max(i + 1, int(np.searchsorted(starts, starts[i] + edges_per_chunk)))
+        first = starts[i]
+        last = starts[j] if j < len(receivers) else len(insources)
+        gathered = shares[insources[first:last]]
+        result[receivers[i:j]] = np.add.reduceat(gathered, starts[i:j] - first, axis=0)
+        i = j
+    return result
+
+
+def personalized_pagerank(graph, damping_factor, seeds, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, monitor=None):
+    """
+    Return the personalized PageRank Solution of `graph` for every set of
+    pages in `seeds` at once: its ranks are an N x k matrix whose column j
+    is the PageRank when the surfer teleports (and leaves pages without
+    links) to a uniformly chosen page of the j-th seed set.
+
+    All k columns are iterated together, so every pass over the links
+    serves every seed set. Iteration stops once every column has moved by
+    less than `tolerance` (L1); residuals are the largest column change.
+    """
+    teleport = personalization(graph, seeds)
+    ranks = teleport.copy()
+    residuals = []
+    if monitor is not None:
+        monitor.begin("personalized")
+
+    for _ in range(max_iterations):
+        flow = incoming(graph, ranks * graph.inverse_outdegree[:, None])
+        dangling_mass = ranks[graph.dangling].sum(axis=0)
+        new = damping_factor * (flow + teleport * dangling_mass) + (1 - damping_factor) * teleport
+        residuals.append(float(np.abs(new - ranks).sum(axis=0).max()))
+        if monitor is not None:
+            monitor.iteration(residuals[-1], len(graph.indices) * len(seeds))
+        ranks = new
+        if residuals[-1] < tolerance:
+            break
+
+    return Solution(ranks, residuals)
+
+
+def push_pagerank(graph, damping_factor, seed, threshold=PUSH_THRESHOLD):
+    """
+    Return a dictionary approximating the personalized PageRank of the pages
+    near `seed`, computed by forward push: rank is moved from a page's
+    residual to its estimate, and the rest pushed to its links, until every
+    page's residual is below `threshold` times its number of links. Only
+    pages reached by pushes are touched; pages without links send their
+    residual back to `seed`.
+    """
+    source = graph.index[seed]
+    estimate = {}
+    remaining = {source: 1.0}
+    queue = deque([source])
+    queued = {source}
+
+    def heavy(page):
+        return remaining.get(page, 0) >= threshold * max(1, int(graph.outdegree[page]))
+
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        mass = remaining.pop(page, 0)
+        estimate[page] = estimate.get(page, 0) + (1 - damping_factor) * mass
+
+        degree = int(graph.outdegree[page])
+        if degree:
+            targets = graph.indices[graph.indptr[page]:graph.indptr[page + 1]].tolist()
+            share = damping_factor * mass / degree
+        else:
+            targets = [source]
+            share = damping_factor * mass
+
+        for target in targets:
+            remaining[target] = remaining.get(target, 0) + share
+            if target not in queued and heavy(target):
+                queued.add(target)
+                queue.append(target)
+
+    return {graph.pages[page]: value for page, value in estimate.items()}
@@ -0,0 +1,122 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+WALKERS = 1024
+BURN_IN = 100
+CHAINS = 8
+
+# Link graph of the current worker process, sent once when the worker starts
+_graph = None
+
+
+def step(graph, pages, damping_factor, rng):
+    """
+    Move every random surfer in `pages` one step: with probability
+    `damping_factor` follow a uniformly chosen link of its page, otherwise
+    (or if the page has no links) jump to a uniformly chosen page.
+    """
+    n = len(pages)
+    degree = graph.outdegree[pages]
+    follow = (rng.random(n) < damping_factor) & (degree > 0)
+    next_pages = rng.integers(0, len(graph), n)
+    offsets = rng.integers(0, degree[follow])
+    next_pages[follow] = graph.indices[graph.indptr[pages[follow]] + offsets]
+    return next_pages
+
+
+def surf(graph, damping_factor, n, walkers=WALKERS, burn_in=BURN_IN, rng=None, monitor=None):
+    """
+    Return an array with the number of times each page of `graph` is visited
+    in `n` samples, taken from a batch of `walkers` random surfers moved
+    together. Each surfer starts on a random page and takes `burn_in` steps
+    before its visits are counted, so the start does not bias the estimate.
+    `monitor`, if given, is told about every batch of steps taken.
+    """
+    rng = np.random.default_rng(rng)
+    counts = np.zeros(len(graph), dtype=np.int64)
+    if monitor is not None:
+        monitor.begin("surf")
+    if n <= 0 or len(graph) == 0:
+        return counts
+
+    pages = rng.integers(0, len(graph), max(1, min(walkers, n)))
+    for _ in range(burn_in):
+        pages = step(graph, pages, damping_factor, rng)
+    if monitor is not None and burn_in:
+        monitor.sampled(burn_in * len(pages))
+
+    # collect visits and count them in chunks, as counting costs O(pages)
+    visits = []
+    buffered = 0
+    remaining = n
+    while True:
+        taken = pages[:remaining]
+        visits.append(taken)
+        buffered += len(taken)
+        remaining -= len(taken)
+        if remaining == 0 or buffered >= len(graph):
+            counts += np.bincount(np.concatenate(visits), minlength=len(graph))
+            if monitor is not None:
+                monitor.sampled(buffered)
+            visits = []
+            buffered = 0
+        if remaining == 0:
+            return counts
+        pages = step(graph, pages, damping_factor, rng)
+
+
+def _start_worker(graph):
+    global _graph
+    _graph = graph
+
+
+def _run_chain(task):
+    damping_factor, n, walkers, burn_in, seed = task
+    return surf(_graph, damping_factor, n, walkers, burn_in, np.random.default_rng(seed))
+
+
+def parallel_surf(graph, damping_factor, n, chains=CHAINS, processes=None, walkers=WALKERS, burn_in=BURN_IN, seed=None):
+    """
+    Return a pair (ranks, errors) of arrays estimating the PageRank of each
+    page of `graph` from `n` samples, split over `chains` independent chains
+    run across `processes` worker processes (all cores if None).
+
+    Every chain has its own random stream spawned from `seed`, so results do
+    not depend on the number of processes. `errors` is the standard error of
+    each page's estimate, from the spread between chains; it shrinks with
+    the square root of `n` (see `required_samples`).
+    """
+    if n <= 0 or len(graph) == 0:
+        return np.zeros(len(graph)), np.full(len(graph), np.nan)
+
+    chains = max(1, min(chains, n))
+    seeds = np.random.SeedSequence(seed).spawn(chains)
+    samples = np.array([n // chains + (c < n % chains) for c in range(chains)])
+    tasks = [
+        (damping_factor, int(samples[c]), walkers, burn_in, seeds[c])
+        for c in range(chains)
+    ]
+
+    if processes == 1:
+        _start_worker(graph)
+        counts = [_run_chain(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_start_worker, initargs=(graph,)) as executor:
+            counts = list(executor.map(_run_chain, tasks))
+    counts = np.array(counts)
+
+    ranks = counts.sum(axis=0) / n
+    if chains < 2:
+        return ranks, np.full(len(graph), np.nan)
+    fractions = counts / samples[:, None]
+    errors = fractions.std(axis=0, ddof=1) / np.sqrt(chains)
+    return ranks, errors
+
+
+def required_samples(errors, n, target):
+    """
+    Return the number of samples needed for the largest standard error in
+    `errors`, measured with `n` samples, to fall to `target`.
+    """
+    return int(np.ceil(n * (np.nanmax(errors) / target) ** 2))
@@ -0,0 +1,299 @@
+import numpy as np
+
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+BLOCKS = 64
+EXTRAPOLATION_PERIOD = 10
+ADAPTIVE_PERIOD = 5
+
+
+class Solution():
+    """
+    Rank vector found by a solver, with the residual after every iteration
+    over all pages. Solvers that also update only some pages in between
+    keep the residuals of those partial sweeps, which are not comparable,
+    apart in `partial`.
+    """
+
+    def __init__(self, ranks, residuals, partial=None):
+        self.ranks = ranks
+        self.residuals = residuals
+        self.partial = [] if partial is None else partial
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+    def __repr__(self):
+        return f"Solution(iterations={self.iterations}, residual={self.residuals[-1] if self.residuals else None})"
+
+
+def residual(new, old, norm="l1"):
+    """
+    Return the distance between two rank vectors, either the sum ("l1") or
+    the largest ("max") of the absolute differences.
+    """
+    difference = np.abs(new - old)
+    if norm == "l1":
+        return float(difference.sum())
+    if norm == "max":
+        return float(difference.max())
+    raise ValueError(f"Unknown norm: {norm}")
+
+
+def propagate(graph, ranks, damping_factor):
+    """
+    Return the rank vector after one step of the random surfer starting
+    from `ranks`. Rank on pages without links is spread over all pages.
+    """
+    n = len(graph)
+    shares = ranks * graph.inverse_outdegree
+    new = np.bincount(graph.indices, weights=shares[graph.sources], minlength=n)
+    dangling_mass = ranks[graph.dangling].sum()
+    return damping_factor * (new + dangling_mass / n) + (1 - damping_factor) / n
+
+
+def _initial(graph, start):
+    n = len(graph)
+    if start is not None:
+        return np.array(start, dtype=float)
+    return np.full(n, 1 / n) if n else np.zeros(0)
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, norm="l1", max_iterations=MAX_ITERATIONS, start=None, monitor=None):
+    """
+    Return the PageRank Solution of `graph` found by repeatedly applying the
+    random surfer step (Jacobi updates), starting from `start` (uniform if
+    None), until successive vectors are less than `tolerance` apart in `norm`.
+    """
+    ranks = _initial(graph, start)
+    residuals = []
+    if monitor is not None:
+        monitor.begin("power")
+    if len(graph) == 0:
+        return Solution(ranks, residuals)
+
+    for _ in range(max_iterations):
+        new = propagate(graph, ranks, damping_factor)
+        residuals.append(residual(new, ranks, norm))
+        if monitor is not None:
+            monitor.iteration(residuals[-1], len(graph.indices))
+        ranks = new
+        if residuals[-1] < tolerance:
+            break
+
+    return Solution(ranks, residuals)
+
+
+def gauss_seidel(graph, damping_factor, tolerance=TOLERANCE, norm="l1", max_iterations=MAX_ITERATIONS, start=None, blocks=BLOCKS, monitor=None):
+    """
+    Return the PageRank Solution of `graph` found by Gauss-Seidel sweeps:
+    pages are updated in place, in `blocks` consecutive groups, so every
+    group already sees the new ranks of the groups before it. With as many
+    blocks as pages this is classic Gauss-Seidel; fewer blocks keep each
+    update vectorized.
+    """
+    n = len(graph)
+    ranks = _initial(graph, start)
+    residuals = []
+    if monitor is not None:
+        monitor.begin("gauss-seidel")
+    if n == 0:
+        return Solution(ranks, residuals)
+
+    inptr, insources = graph.inlinks
+    targets = np.repeat(np.arange(n), np.diff(inptr))
+    bounds = np.linspace(0, n, min(blocks, n) + 1).astype(np.int64)
+    teleport = (1 - damping_factor) / n
+
+    for _ in range(max_iterations):
+        old = ranks.copy()
+        dangling_mass = ranks[graph.dangling].sum()
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            edges = slice(inptr[a], inptr[b])
+            sources = insources[edges]
+            incoming = np.bincount(
+                targets[edges] - a,
+                weights=ranks[sources] * graph.inverse_outdegree[sources],
+                minlength=b - a
+            )
+            block = damping_factor * (incoming + dangling_mass / n) + teleport
+
+            # keep the dangling mass in step with the pages just updated
+            dangling = graph.dangling[a:b]
+            dangling_mass += block[dangling].sum() - ranks[a:b][dangling].sum()
+            ranks[a:b] = block
+
+        ranks /= ranks.sum()
+        residuals.append(residual(ranks, old, norm))
+        if monitor is not None:
+            monitor.iteration(residuals[-1], len(graph.indices))
+        if residuals[-1] < tolerance:
+            break
+
+    return Solution(ranks, residuals)
+
+
+def aitken(x2, x1, x0):
+    """
+    Return the componentwise Aitken delta-squared extrapolation of the
+    three latest iterates `x0`, `x1`, `x2` (oldest last).
+    """
+    first = x0 - x1
+    second = x0 - 2 * x1 + x2
+    safe = np.abs(second) > 1e-15
+    extrapolated = x0.copy()
+    extrapolated[safe] = x0[safe] - first[safe] ** 2 / second[safe]
+    return extrapolated
+
+
+def quadratic(x3, x2, x1, x0):
+    """
+    Return the quadratic extrapolation of the four latest iterates `x0`,
+    `x1`, `x2`, `x3` (oldest last), which removes the components along the
+    second and third eigenvectors assuming they dominate the error.
+    """
+    y = np.column_stack([x2 - x3, x1 - x3])
+    gamma, *_ = np.linalg.lstsq(y, -(x0 - x3), rcond=None)
+    g1, g2 = gamma
+    return (g1 + g2 + 1) * x2 + (g2 + 1) * x1 + x0
+
+
+def extrapolated_power_iteration(graph, damping_factor, tolerance=TOLERANCE, norm="l1", max_iterations=MAX_ITERATIONS, start=None, kind="quadratic", period=EXTRAPOLATION_PERIOD, monitor=None):
+    """
+    Return the PageRank Solution of `graph` found by power iteration, with
+    the iterate replaced by its `kind` ("aitken" or "quadratic")
+    extrapolation every `period` iterations.
+    """
+    if kind not in ["aitken", "quadratic"]:
+        raise ValueError(f"Unknown extrapolation: {kind}")
+    needed = 3 if kind == "aitken" else 4
+
+    ranks = _initial(graph, start)
+    residuals = []
+    if monitor is not None:
+        monitor.begin("extrapolation")
+    if len(graph) == 0:
+        return Solution(ranks, residuals)
+
+    history = [ranks]
+    for iteration in range(1, max_iterations + 1):
+        new = propagate(graph, ranks, damping_factor)
+        residuals.append(residual(new, ranks, norm))
+        ranks = new
+        edges = len(graph.indices)
+        if residuals[-1] < tolerance:
+            if monitor is not None:
+                monitor.iteration(residuals[-1], edges)
+            break
+
+        history = [ranks] + history[:needed - 1]
+        if iteration % period == 0 and len(history) == needed:
+            extrapolated = aitken(*reversed(history)) if kind == "aitken" else quadratic(*reversed(history))
+            extrapolated = np.abs(extrapolated)
+            extrapolated /= extrapolated.sum()
+
+            # only keep the extrapolation if it is closer to a fixed point
+            edges += len(graph.indices)
+            if residual(propagate(graph, extrapolated, damping_factor), extrapolated, norm) < residuals[-1]:
+                ranks = extrapolated
+                history = [ranks]
+
+        if monitor is not None:
+            monitor.iteration(residuals[-1], edges)
+
+    return Solution(ranks, residuals)
+
+
+def adaptive_power_iteration(graph, damping_factor, tolerance=TOLERANCE, norm="l1", max_iterations=MAX_ITERATIONS, start=None, freeze=None, period=ADAPTIVE_PERIOD, monitor=None):
+    """
+    Return the PageRank Solution of `graph` found by adaptive power
+    iteration: every `period` iterations a full step updates all pages, and
+    pages whose rank changed by less than `freeze` (by default `tolerance`)
+    times its value are frozen until the next full step. In between only
+    the in-links of pages still changing are processed. Convergence is only
+    checked on full steps, so frozen pages cannot stop iteration early; a
+    full step is taken as soon as the moving pages settle. The residuals
+    of the Solution are those of full steps, and its `partial` residuals,
+    over the moving pages only, those of the steps in between.
+
+    This only saves work when most pages converge much sooner than a few
+    slow ones, as on large crawls of the web. On small or synthetic
+    power-law corpora pages converge at similar rates, and it can process
+    more edges than `power_iteration` for a slightly less accurate result.
+    """
+    n = len(graph)
+    ranks = _initial(graph, start)
+    residuals = []
+    partial = []
+    if monitor is not None:
+        monitor.begin("adaptive")
+    if n == 0:
+        return Solution(ranks, residuals, partial)
+    if freeze is None:
+        freeze = tolerance
+
+    inptr, insources = graph.inlinks
+    targets = np.repeat(np.arange(n), np.diff(inptr))
+    teleport = (1 - damping_factor) / n
+
+    since = period
+    for iteration in range(max_iterations):
+        if since >= period:
+            since = 0
+            new = propagate(graph, ranks, damping_factor)
+            residuals.append(residual(new, ranks, norm))
+            if monitor is not None:
+                monitor.iteration(residuals[-1], len(graph.indices))
+            if residuals[-1] < tolerance:
+                ranks = new
+                break
+
+            # freeze pages that stopped changing, and drop the edges into them
+            moving = np.abs(new - ranks) >= freeze * ranks
+            active = np.flatnonzero(moving)
+            edges = np.flatnonzero(moving[targets])
+            position = np.cumsum(moving) - 1
+            sources = insources[edges]
+            local = position[targets[edges]]
+            ranks = new
+            continue
+
+        # update the moving pages in place; frozen pages do not change
+        incoming = np.bincount(
+            local,
+            weights=ranks[sources] * graph.inverse_outdegree[sources],
+            minlength=len(active)
+        )
+        dangling_mass = ranks[graph.dangling].sum()
+        updated = damping_factor * (incoming + dangling_mass / n) + teleport
+        partial.append(residual(updated, ranks[active], norm) if len(active) else 0.0)
+        if monitor is not None:
+            monitor.iteration(partial[-1], len(sources))
+        ranks[active] = updated
+
+        # check the whole ranking with a full step once the moving pages settle
+        since = period if partial[-1] < tolerance else since + 1
+
+    return Solution(ranks, residuals, partial)
+
+
+# Solvers by name; "adaptive" only pays off on graphs where convergence
+# is very uneven between pages (see `adaptive_power_iteration`)
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "extrapolation": extrapolated_power_iteration,
+    "adaptive": adaptive_power_iteration
+}
+
+
+def solve(graph, damping_factor, method="power", **options):
+    """
+    Return the PageRank Solution of `graph` using the solver named `method`,
+    one of SOLVERS, passing it any further `options`. Every solver takes a
+    `monitor` option (an instrument.Monitor) told about each iteration.
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown solver: {method}")
+    return SOLVERS[method](graph, damping_factor, **options)
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import heredity
+
+EXACT = ["elimination", "vectorized", "enumeration"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for many families at once."
+    )
+    parser.add_argument("path",
+                        help="CSV file, possibly of many unrelated families, or directory of CSV files")
+    parser.add_argument("-m", "--method", choices=EXACT, default="elimination",
+                        help="exact inference method used for each family")
+    parser.add_argument("-p", "--processes", type=int, default=None,
+                        help="number of worker processes (all cores if omitted)")
+    parser.add_argument("-o", "--output",
+                        help="file to write the probabilities to as JSON, instead of printing them")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        files = sorted(
+            os.path.join(args.path, name)
+            for name in os.listdir(args.path) if name.endswith(".csv")
+        )
+    else:
+        files = [args.path]
+    datasets = {filename: heredity.load_data(filename) for filename in files}
+
+    start = time.perf_counter()
+    results, statistics = solve_all(list(datasets.values()), args.method, args.processes)
+    statistics["seconds"] = time.perf_counter() - start
+    print(json.dumps(statistics), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(zip(files, results)), f, indent=2)
+        return
+    for filename, probabilities in zip(files, results):
+        if len(files) > 1:
+            print(f"{filename}:")
+        heredity.print_probabilities(probabilities)
+
+
+def families(people):
+    """
+    Split `people` (as loaded by `load_data`) into connected families,
+    returning a list of dictionaries of the same form. People are linked to
+    their parents; everyone in a family is related through some chain of
+    parents and children.
+    """
+    root = {person: person for person in people}
+
+    def find(person):
+        while root[person] != person:
+            root[person] = root[root[person]]
+            person = root[person]
+        return person
+
+    for person in people:
+        for parent in [people[person]["mother"], people[person]["father"]]:
+            if parent is not None:
+                root[find(parent)] = find(person)
+
+    groups = dict()
+    for person in people:
+        groups.setdefault(find(person), dict())[person] = people[person]
+    return list(groups.values())
+
+
+def canonical(people):
+    """
+    Return a pair (key, order) for the family `people`: `order` lists its
+    people in a canonical order, and `key` describes the family in that
+    order, as the known trait and the positions of the parents of everyone.
+
+    Families with equal keys have the same structure and evidence, so the
+    same probabilities by position. People are ordered by repeatedly
+    refining a label made from their trait and the labels of their parents
+    and children, so differently named or listed copies of a family usually
+    get the same key.
+    """
+    names = list(people)
+    children = {person: [] for person in names}
+    for person in names:
+        for role in ["mother", "father"]:
+            parent = people[person][role]
+            if parent is not None:
+                children[parent].append((role, person))
+
+    # labels are ranks of signatures, so they stay small and collision-free
+    labels = {person: [None, False, True].index(people[person]["trait"]) for person in names}
+    classes = 0
+    while True:
+        signatures = {
+            person: (
+                labels[person],
+                tuple(
+                    labels[people[person][role]] if people[person][role] is not None else -1
+                    for role in ["mother", "father"]
+                ),
+                tuple(sorted((role, labels[child]) for role, child in children[person]))
+            )
+            for person in names
+        }
+        ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures.values())))}
+        labels = {person: ranks[signatures[person]] for person in names}
+        if len(ranks) == classes:
+            break
+        classes = len(ranks)
+
+    order = sorted(names, key=lambda person: labels[person])
+    position = {person: i for i, person in enumerate(order)}
+    key = tuple(
+        (
+            people[person]["trait"],
+            position.get(people[person]["mother"]),
+            position.get(people[person]["father"])
+        )
+        for person in order
+    )
+    return key, order
+
+
+def _solve(task):
+    method, people, model = task
+    return heredity.METHODS[method](people, model)
+
+
+def solve_all(datasets, method="elimination", processes=None, model=heredity.MODEL):
+    """
+    Return a pair (results, statistics) for a list of `datasets`, each a
+    dictionary of people as loaded by `load_data`: `results` holds the
+    probabilities of each dataset under `model`, in the form built by
+    heredity.py `main`, and `statistics` counts the families and distinct
+    families solved.
+
+    Datasets are split into connected families and each distinct family
+    (by `canonical` key) is solved once, across `processes` worker
+    processes; its probabilities are reused for every identical family.
+    """
+    keyed = []
+    representatives = dict()
+    for people in datasets:
+        keyed.append([])
+        for family in families(people):
+            key, order = canonical(family)
+            keyed[-1].append((key, order))
+            representatives.setdefault(key, (family, order))
+
+    keys = list(representatives)
+    tasks = [(method, representatives[key][0], model) for key in keys]
+    if processes == 1 or len(tasks) < 2:
+        solved = [_solve(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunk = max(1, len(tasks) // (4 * (processes or os.cpu_count() or 1)))
+            solved = list(executor.map(_solve, tasks, chunksize=chunk))
+
+    # probabilities of each distinct family, by canonical position
+    memo = {
+        key: [probabilities[person] for person in representatives[key][1]]
+        for key, probabilities in zip(keys, solved)
+    }
+
+    results = []
+    for people, split in zip(datasets, keyed):
+        probabilities = dict()
+        for key, order in split:
+            for person, result in zip(order, memo[key]):
+                probabilities[person] = {field: dict(values) for field, values in result.items()}
+        results.append({person: probabilities[person] for person in people})
+
+    statistics = {
+        "datasets": len(datasets),
+        "families": sum(len(split) for split in keyed),
+        "distinct": len(keys)
+    }
+    return results, statistics
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import heapq
+import itertools
+
+import numpy as np
+
+from model import GENES
+
+
+def network(people, model):
+    """
+    Return the family Bayesian network of `people` (as loaded by
+    `load_data`) as a list of factors over gene variables, one per person.
+    Each factor is a pair (scope, table): the scope is a tuple of indices
+    into `people`, and the table has one axis of size 3 per variable.
+
+    Every person's trait is summed out of the network: a known trait
+    multiplies their factor by its probability given each gene count, and
+    an unknown trait contributes nothing.
+    """
+    index = {name: i for i, name in enumerate(people)}
+
+    factors = []
+    for i, person in enumerate(people.values()):
+        if person["trait"] is None:
+            evidence = np.ones(3)
+        else:
+            evidence = model.trait[:, int(person["trait"])]
+
+        if person["mother"] is None:
+            factors.append(((i,), model.prior * evidence))
+        else:
+            parents = (index[person["mother"]], index[person["father"]])
+            factors.append((parents + (i,), model.inheritance * evidence))
+    return factors
+
+
+def contract(factors, scope):
+    """
+    Return the table over `scope` of the product of `factors`, summing out
+    every variable not in `scope`.
+    """
+    labels = {}
+    operands = []
+    for variables, table in factors:
+        operands.append(table)
+        operands.append([labels.setdefault(v, len(labels)) for v in variables])
+    return np.einsum(*operands, [labels[v] for v in scope])
+
+
+def _normalized(table):
+    total = table.sum()
+    return table / total if total > 0 else table
+
+
+def elimination_order(factors, n):
+    """
+    Return an order in which to eliminate the `n` variables of `factors`,
+    chosen greedily to add the fewest edges (fill-in) to the graph of
+    variables sharing a factor, breaking ties by fewest neighbors.
+    """
+    neighbors = [set() for _ in range(n)]
+    for scope, _ in factors:
+        for v in scope:
+            neighbors[v].update(scope)
+    for v in range(n):
+        neighbors[v].discard(v)
+
+    def cost(v):
+        fill = sum(
+            1 for a, b in itertools.combinations(neighbors[v], 2)
+            if b not in neighbors[a]
+        )
+        return (fill, len(neighbors[v]), v)
+
+    heap = [cost(v) for v in range(n)]
+    heapq.heapify(heap)
+    eliminated = set()
+    order = []
+
+    while heap:
+        entry = heapq.heappop(heap)
+        v = entry[2]
+        if v in eliminated or entry != cost(v):
+            continue
+
+        # connect the neighbors of v to each other, then remove v
+        eliminated.add(v)
+        order.append(v)
+        adjacent = neighbors[v]
+        for a in adjacent:
+            neighbors[a].discard(v)
+            neighbors[a].update(adjacent - {a})
+
+        # only the costs of variables near v can have changed
+        affected = set(adjacent)
+        for a in adjacent:
+            affected.update(neighbors[a])
+        for a in affected:
+            heapq.heappush(heap, cost(a))
+
+    return order
+
+
+def marginals(factors, n):
+    """
+    Return an n x 3 array of the posterior distribution of each of the `n`
+    gene variables of `factors`.
+
+    Variables are eliminated one at a time, each elimination forming a
+    clique of a junction tree; the upward pass sends each clique's message
+    to the clique that eliminates the next of its variables, and the
+    downward pass sends messages back, so every clique ends calibrated and
+    all marginals cost two passes. Messages are normalized as they go to
+    avoid underflow in large families.
+    """
+    order = elimination_order(factors, n)
+    position = {v: k for k, v in enumerate(order)}
+
+    def first(scope):
+        return min(position[v] for v in scope)
+
+    # assign every factor to the clique of its first eliminated variable
+    assigned = [[] for _ in range(n)]
+    for factor in factors:
+        assigned[first(factor[0])].append(factor)
+
+    potentials = [None] * n
+    separators = [None] * n
+    upward = [dict() for _ in range(n)]
+
+    # upward pass, which is variable elimination in `order`
+    for k, v in enumerate(order):
+        local = {v}
+        for variables, _ in assigned[k]:
+            local.update(variables)
+        local = tuple(sorted(local, key=position.get))
+        potentials[k] = (local, contract(assigned[k] + [((v,), np.ones(3))], local))
+
+        scope = set(local)
+        for variables, _ in upward[k].values():
+            scope.update(variables)
+        scope = tuple(sorted(scope, key=position.get))
+        separators[k] = scope[1:]
+        if separators[k]:
+            message = contract([potentials[k]] + list(upward[k].values()), separators[k])
+            upward[first(separators[k])][k] = (separators[k], _normalized(message))
+
+    # downward pass, from the cliques eliminated last
+    downward = [None] * n
+    result = np.empty((n, 3))
+    for k in reversed(range(n)):
+        incoming = [potentials[k]] + list(upward[k].values())
+        if downward[k] is not None:
+            incoming.append(downward[k])
+
+        belief = contract(incoming, (order[k],))
+        total = belief.sum()
+        if total <= 0:
+            raise ValueError("Evidence is impossible under the model")
+        result[order[k]] = belief / total
+
+        for child, message in upward[k].items():
+            others = [factor for factor in incoming if factor is not message]
+            downward[child] = (separators[child], _normalized(contract(others, separators[child])))
+
+    return result
+
+
+def infer(people, model):
+    """
+    Return the exact probability distributions of every person's gene count
+    and trait given the known traits under `model` (a model.Model), in the
+    same form as the `probabilities` dictionary built by heredity.py `main`.
+    """
+    genes = marginals(network(people, model), len(people))
+    trait = model.trait[:, 1]
+
+    probabilities = dict()
+    for (name, person), gene in zip(people.items(), genes):
+        if person["trait"] is None:
+            has_trait = float(gene @ trait)
+        else:
+            has_trait = 1.0 if person["trait"] else 0.0
+        probabilities[name] = {
+            "gene": {g: float(gene[g]) for g in reversed(GENES)},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
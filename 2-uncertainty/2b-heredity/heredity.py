@@ -2,6 +2,11 @@ import csv
 import itertools
 import sys
 
+import elimination
+import sampling
+import vectorized
+from model import Model
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,13 +41,45 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Tables of PROBS, computed once for every inference method
+MODEL = Model.from_probs(PROBS)
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3] or (len(sys.argv) == 3 and sys.argv[2] not in METHODS):
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "elimination"
+
+    # Compute gene and trait probabilities for each person
+    probabilities = METHODS[method](people)
+
+    # Print results
+    print_probabilities(probabilities)
+
+
+def print_probabilities(probabilities):
+    """
+    Print the gene and trait probabilities of each person.
+    """
+    for person in probabilities:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people, model=MODEL):
+    """
+    Return the gene and trait probabilities for each person, computed by
+    summing the joint probability of every assignment of genes and traits
+    consistent with the known traits. Takes time exponential in the number
+    of people.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -60,38 +97,71 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
+    # Fix people with known traits, and loop over the rest
     names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+    known = set(person for person in names if people[person]["trait"])
+    unknown = [person for person in names if people[person]["trait"] is None]
+    order = family_order(people)
+    for extra in powerset(unknown):
+        have_trait = known | extra
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+        # Loop over gene assignments that are possible given the traits
+        for one_gene, two_genes, p in gene_assignments(people, order, have_trait, model):
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+            # Update probabilities with new joint probability
+            update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
-    normalize(probabilities)
+    return normalize(probabilities)
 
-    # Print results
+
+def eliminate_probabilities(people, model=MODEL):
+    """
+    Return the gene and trait probabilities for each person, computed
+    exactly by message passing over the family network. Takes time linear
+    in the number of people when the family tree has no loops.
+    """
+    return elimination.infer(people, model)
+
+
+def vectorized_probabilities(people, model=MODEL):
+    """
+    Return the gene and trait probabilities for each person, computed by
+    summing the joint probability of every assignment like
+    `enumerate_probabilities`, but with whole batches of assignments
+    scored at once by NumPy table lookups in log space.
+    """
+    return vectorized.infer(people, model)
+
+
+def sample_probabilities(people, method, model=MODEL):
+    """
+    Return approximate gene and trait probabilities for each person,
+    estimated by the sampling `method` over parallel chains. The effective
+    sample size and largest standard error of each person's probabilities
+    are reported on standard error.
+    """
+    probabilities, errors, ess = sampling.approximate(people, model, method)
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        error = max(max(errors[person][field].values()) for field in errors[person])
+        print(f"{person}: effective sample size {ess[person]:.0f}, error ±{error:.4f}", file=sys.stderr)
+    return probabilities
+
+
+def gibbs_probabilities(people, model=MODEL):
+    """
+    Return approximate gene and trait probabilities for each person, by
+    Gibbs sampling. Takes time linear in the number of people.
+    """
+    return sample_probabilities(people, "gibbs", model)
+
+
+def weighting_probabilities(people, model=MODEL):
+    """
+    Return approximate gene and trait probabilities for each person, by
+    likelihood weighting. Takes time linear in the number of people.
+    """
+    return sample_probabilities(people, "likelihood-weighting", model)
 
 
 def load_data(filename):
@@ -118,17 +188,93 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Generate all possible subsets of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for r in range(len(s) + 1):
+        for subset in itertools.combinations(s, r):
+            yield set(subset)
+
+
+def family_order(people):
+    """
+    Return the names in `people` ordered so that everyone comes after
+    their parents.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        placed.add(person)
+        for parent in [people[person]["mother"], people[person]["father"]]:
+            if parent is not None:
+                place(parent)
+        order.append(person)
+
+    for person in people:
+        place(person)
+    return order
+
+
+def gene_assignments(people, order, have_trait, model=MODEL):
+    """
+    Generate every assignment of gene counts to `people` with a nonzero
+    joint probability given that exactly the people in `have_trait` have
+    the trait, as tuples (one_gene, two_genes, p) where `p` is the joint
+    probability.
+
+    People are assigned in `order`, parents before children, so each
+    person's probability is known as soon as they are assigned, and no
+    assignment extending a partial one with probability zero is visited.
+    """
+    genes = dict()
+
+    def extend(i, probability):
+        if i == len(order):
+            one_gene = set(person for person in genes if genes[person] == 1)
+            two_genes = set(person for person in genes if genes[person] == 2)
+            yield one_gene, two_genes, probability
+            return
+
+        person = order[i]
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        for gene_number in [0, 1, 2]:
+            p = probability * person_probability(
+                gene_number,
+                person in have_trait,
+                genes.get(mother),
+                genes.get(father),
+                model
+            )
+            if p == 0:
+                continue
+            genes[person] = gene_number
+            yield from extend(i + 1, p)
+        genes.pop(person, None)
+
+    yield from extend(0, 1)
+
+
+def person_probability(gene_number, trait, mother_genes=None, father_genes=None, model=MODEL):
+    """
+    Return the probability that a person has `gene_number` copies of the
+    gene and has the trait if `trait`, given the gene counts of their
+    parents (None for people without parents).
+    """
+    trait_prop = model.trait_values[gene_number][trait]
+
+    if mother_genes is None:
+        # no parents, use probability distribution
+        return model.prior_values[gene_number] * trait_prop
+
+    # info about parents is available, with what they pass on precomputed
+    return model.inheritance_values[mother_genes][father_genes][gene_number] * trait_prop
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def joint_probability(people, one_gene, two_genes, have_trait, model=MODEL):
     """
     Compute and return a joint probability.
 
@@ -145,34 +291,14 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         gene_number = 1 if person in one_gene else 2 if person in two_genes else 0
         trait = True if person in have_trait else False
 
-        gene_numb_prop = PROBS['gene'][gene_number]
-        trait_prop = PROBS['trait'][gene_number][trait]
-
-        if people[person]['mother'] is None:
-            # no parents, use probability distribution
-            probability *= gene_numb_prop * trait_prop
+        mother = people[person]['mother']
+        father = people[person]['father']
+        if mother is None:
+            probability *= person_probability(gene_number, trait, model=model)
         else:
-            # info about parents is available
-            mother = people[person]['mother']
-            father = people[person]['father']
-            percentages = {}
-
-            for ppl in [mother, father]:
-                number = 1 if ppl in one_gene else 2 if ppl in two_genes else 0
-                perc = 0 + PROBS['mutation'] if number == 0 else 0.5 if number == 1 else 1 - PROBS['mutation']
-                percentages[ppl] = perc
-
-            if gene_number == 0:
-                # 0, none of parents gave gene
-                probability *= (1 - percentages[mother]) * (1 - percentages[father])
-            elif gene_number == 1:
-                # 1, one of parents gave gene
-                probability *= (1 - percentages[mother]) * percentages[father] + percentages[mother] * (1 - percentages[father])
-            else:
-                # 2, both of parents gave gene
-                probability *= percentages[mother] * percentages[father]
-
-            probability *= trait_prop
+            mother_genes = 1 if mother in one_gene else 2 if mother in two_genes else 0
+            father_genes = 1 if father in one_gene else 2 if father in two_genes else 0
+            probability *= person_probability(gene_number, trait, mother_genes, father_genes, model)
 
     return probability
 
@@ -206,5 +332,14 @@ def normalize(probabilities):
     return normalized
 
 
+METHODS = {
+    "elimination": eliminate_probabilities,
+    "enumeration": enumerate_probabilities,
+    "gibbs": gibbs_probabilities,
+    "likelihood-weighting": weighting_probabilities,
+    "vectorized": vectorized_probabilities
+}
+
+
 if __name__ == "__main__":
     main()
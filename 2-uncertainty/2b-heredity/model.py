@@ -0,0 +1,82 @@
+import numpy as np
+
+GENES = (0, 1, 2)
+
+
+class Model():
+    """
+    Parameters of the heredity model, with every table the inference
+    engines need computed once:
+
+        prior[g]              probability that a person without parents has
+                              `g` copies of the gene
+        trait[g, t]           probability of trait `t` (0 or 1) given `g`
+                              copies of the gene
+        passes[g]             probability that a parent with `g` copies
+                              passes the gene on
+        inheritance[m, f, c]  probability that a child has `c` copies given
+                              their mother's `m` and father's `f`
+
+    and their logarithms as log_prior, log_trait and log_inheritance. The
+    same tables as nested lists, faster to index one entry at a time from
+    plain Python, are prior_values, trait_values and inheritance_values.
+    """
+
+    def __init__(self, gene, trait, mutation):
+        """
+        Create a model from the gene priors `gene` (mapping 0, 1 and 2 to
+        probabilities), trait probabilities `trait` (mapping each gene count
+        to a mapping of True and False to probabilities) and the mutation
+        probability `mutation`.
+        """
+        self.gene = dict(gene)
+        self.trait_probabilities = {g: dict(trait[g]) for g in GENES}
+        self.mutation = mutation
+
+        self.prior = np.array([gene[g] for g in GENES], dtype=float)
+        self.trait = np.array([[trait[g][False], trait[g][True]] for g in GENES], dtype=float)
+        if np.any(self.prior < 0) or not np.isclose(self.prior.sum(), 1):
+            raise ValueError("Gene probabilities must be a distribution")
+        if np.any(self.trait < 0) or not np.allclose(self.trait.sum(axis=1), 1):
+            raise ValueError("Trait probabilities must be distributions")
+        if not 0 <= mutation <= 1:
+            raise ValueError("Mutation probability must be between 0 and 1")
+
+        self.passes = np.array([mutation, 0.5, 1 - mutation])
+        mother = self.passes[:, None]
+        father = self.passes[None, :]
+        self.inheritance = np.empty((3, 3, 3))
+        self.inheritance[:, :, 0] = (1 - mother) * (1 - father)
+        self.inheritance[:, :, 1] = mother * (1 - father) + (1 - mother) * father
+        self.inheritance[:, :, 2] = mother * father
+
+        with np.errstate(divide="ignore"):
+            self.log_prior = np.log(self.prior)
+            self.log_trait = np.log(self.trait)
+            self.log_inheritance = np.log(self.inheritance)
+
+        self.prior_values = self.prior.tolist()
+        self.trait_values = self.trait.tolist()
+        self.inheritance_values = self.inheritance.tolist()
+
+    @classmethod
+    def from_probs(cls, probs):
+        """
+        Create a model from a dictionary of the form of heredity.py `PROBS`.
+        """
+        return cls(probs["gene"], probs["trait"], probs["mutation"])
+
+    @property
+    def probs(self):
+        """
+        The parameters of the model, as a dictionary of the form of
+        heredity.py `PROBS`.
+        """
+        return {
+            "gene": dict(self.gene),
+            "trait": {g: dict(self.trait_probabilities[g]) for g in GENES},
+            "mutation": self.mutation
+        }
+
+    def __repr__(self):
+        return f"Model(gene={self.gene}, trait={self.trait_probabilities}, mutation={self.mutation})"
@@ -0,0 +1,254 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model import GENES
+from vectorized import encode
+
+SAMPLES = 100000
+CHAINS = 8
+BATCH = 1000
+WALKERS = 100
+BURN_IN = 100
+
+# Standard errors below this are rounding noise between identical chains
+TOLERANCE = 1e-12
+
+
+def parents(people):
+    """
+    Return a pair (order, parents): the indices of `people` ordered so that
+    everyone comes after their parents, and an n x 2 array of the indices
+    of each person's mother and father (-1 for people without parents).
+    """
+    founders, children, mothers, fathers, _ = encode(people)
+    links = np.full((len(people), 2), -1, dtype=np.intp)
+    links[children, 0] = mothers
+    links[children, 1] = fathers
+
+    order = []
+    placed = np.zeros(len(people), dtype=bool)
+    for person in range(len(people)):
+        stack = [person]
+        while stack:
+            current = stack[-1]
+            if placed[current]:
+                stack.pop()
+                continue
+            waiting = [p for p in links[current] if p >= 0 and not placed[p]]
+            if waiting:
+                stack.extend(waiting)
+            else:
+                placed[current] = True
+                order.append(current)
+                stack.pop()
+    return np.array(order, dtype=np.intp), links
+
+
+def choose(probabilities, rng):
+    """
+    Return, for every row of `probabilities` (weights of 0, 1 and 2 copies
+    of the gene), a gene count drawn in proportion to its weights.
+    """
+    cumulative = probabilities.cumsum(axis=1)
+    u = rng.random(len(probabilities)) * cumulative[:, -1]
+    return (u[:, None] >= cumulative[:, :2]).sum(axis=1)
+
+
+def forward(model, family, walkers, rng):
+    """
+    Return a walkers x n array of gene counts drawn from `model` without
+    evidence, assigning parents before their children.
+    """
+    order, links = family
+    genes = np.empty((walkers, len(links)), dtype=np.intp)
+    for person in order:
+        mother, father = links[person]
+        if mother < 0:
+            weights = np.broadcast_to(model.prior, (walkers, 3))
+        else:
+            weights = model.inheritance[genes[:, mother], genes[:, father]]
+        genes[:, person] = choose(weights, rng)
+    return genes
+
+
+def likelihood_weighting(model, family, evidence, samples, batch=BATCH, rng=None):
+    """
+    Return a pair (genes, traits) estimating each person's gene count
+    distribution (n x 3) and probability of having the trait (n), from
+    `samples` gene assignments drawn `batch` at a time in parents-first
+    order and weighted by the probability of the known traits.
+
+    Unknown traits are not sampled: the probability of the trait given each
+    sampled gene count is averaged instead, which has lower variance.
+    """
+    rng = np.random.default_rng(rng)
+    trait = model.trait
+    log_trait = model.log_trait
+    n = len(evidence)
+    known = np.flatnonzero(evidence >= 0)
+
+    # totals are kept scaled by exp(-shift), the largest log weight
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros(n)
+    shift = -np.inf
+    remaining = samples
+
+    while remaining > 0:
+        size = min(batch, remaining)
+        remaining -= size
+        genes = forward(model, family, size, rng)
+        logw = log_trait[genes[:, known], evidence[known]].sum(axis=1)
+
+        largest = logw.max()
+        if largest == -np.inf:
+            continue
+        if largest > shift:
+            scale = np.exp(shift - largest)
+            gene_totals *= scale
+            trait_totals *= scale
+            shift = largest
+
+        w = np.exp(logw - shift)
+        for g in GENES:
+            gene_totals[:, g] += w @ (genes == g)
+        trait_totals += w @ trait[genes, 1]
+
+    if shift == -np.inf:
+        raise ValueError("Evidence is impossible under the model")
+    weight = gene_totals[0].sum()
+    traits = trait_totals / weight
+    traits[known] = evidence[known]
+    return gene_totals / weight, traits
+
+
+def gibbs(model, family, evidence, samples, walkers=WALKERS, burn_in=BURN_IN, rng=None):
+    """
+    Return a pair (genes, traits) estimating each person's gene count
+    distribution (n x 3) and probability of having the trait (n) by Gibbs
+    sampling: `walkers` assignments, started from the model without
+    evidence, are swept `burn_in` times and then until `samples` updates
+    per person have been made. Each sweep redraws every person's gene count
+    given their parents, children, spouses and known trait. Few walkers
+    swept many times mix better than many walkers swept a few times.
+
+    Estimates average the conditional distribution of every update rather
+    than the drawn value, and unknown traits are summed out, both of which
+    lower variance.
+    """
+    rng = np.random.default_rng(rng)
+    trait = model.trait
+    log_prior = model.log_prior
+    log_trait = model.log_trait
+    log_table = model.log_inheritance
+    order, links = family
+    n = len(evidence)
+    sweeps = max(1, -(-samples // walkers))
+
+    # factors each person's gene count takes part in, besides their own
+    children = [[] for _ in range(n)]
+    for child in range(n):
+        mother, father = links[child]
+        if mother >= 0:
+            children[mother].append((child, father, 0))
+            children[father].append((child, mother, 1))
+
+    genes = forward(model, family, walkers, rng)
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros(n)
+
+    for sweep in range(burn_in + sweeps):
+        for person in order:
+            mother, father = links[person]
+            if mother < 0:
+                logits = np.broadcast_to(log_prior, (walkers, 3)).copy()
+            else:
+                logits = log_table[genes[:, mother], genes[:, father]]
+            if evidence[person] >= 0:
+                logits += log_trait[:, evidence[person]]
+            for child, other, role in children[person]:
+                if role == 0:
+                    logits += log_table[:, genes[:, other], genes[:, child]].T
+                else:
+                    logits += log_table[genes[:, other], :, genes[:, child]]
+
+            weights = np.exp(logits - logits.max(axis=1, keepdims=True))
+            weights /= weights.sum(axis=1, keepdims=True)
+            genes[:, person] = choose(weights, rng)
+            if sweep >= burn_in:
+                gene_totals[person] += weights.sum(axis=0)
+                trait_totals[person] += weights.sum(axis=0) @ trait[:, 1]
+
+    updates = sweeps * walkers
+    traits = trait_totals / updates
+    known = evidence >= 0
+    traits[known] = evidence[known]
+    return gene_totals / updates, traits
+
+
+METHODS = {
+    "likelihood-weighting": likelihood_weighting,
+    "gibbs": gibbs
+}
+
+
+def _run_chain(task):
+    method, model, family, evidence, samples, seed = task
+    return METHODS[method](model, family, evidence, samples, rng=np.random.default_rng(seed))
+
+
+def approximate(people, model, method="gibbs", samples=SAMPLES, chains=CHAINS, processes=None, seed=None):
+    """
+    Return a tuple (probabilities, errors, ess) of approximate gene and
+    trait probabilities for each person under `model` (a model.Model), in
+    the same form as the `probabilities` dictionary built by heredity.py
+    `main`, using `method` (one of METHODS) with `samples` samples split
+    over `chains` independent chains run across `processes` worker
+    processes (all cores if None). `errors` has the same form, holding the
+    standard error of every probability from the spread between chains,
+    and `ess` maps each person to their effective sample size: the number
+    of independent samples that would give their least precise gene
+    probability the same error.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown sampling method: {method}")
+    family = parents(people)
+    evidence = encode(people)[-1]
+
+    chains = max(2, chains)
+    seeds = np.random.SeedSequence(seed).spawn(chains)
+    tasks = [
+        (method, model, family, evidence, samples // chains + (c < samples % chains), seeds[c])
+        for c in range(chains)
+    ]
+    if processes == 1:
+        results = [_run_chain(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_run_chain, tasks))
+
+    genes = np.array([result[0] for result in results])
+    traits = np.array([result[1] for result in results])
+    gene_errors = genes.std(axis=0, ddof=1) / np.sqrt(chains)
+    trait_errors = traits.std(axis=0, ddof=1) / np.sqrt(chains)
+    genes = genes.mean(axis=0)
+    traits = traits.mean(axis=0)
+
+    # binomial variance over squared error, for the least precise gene count,
+    # at most the number of samples drawn
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ess = np.where(gene_errors > TOLERANCE, genes * (1 - genes) / gene_errors ** 2, np.inf).min(axis=1)
+    ess = np.minimum(ess, samples)
+
+    probabilities = dict()
+    errors = dict()
+    for i, name in enumerate(people):
+        probabilities[name] = {
+            "gene": {g: float(genes[i, g]) for g in reversed(GENES)},
+            "trait": {True: float(traits[i]), False: float(1 - traits[i])}
+        }
+        errors[name] = {
+            "gene": {g: float(gene_errors[i, g]) for g in reversed(GENES)},
+            "trait": {True: float(trait_errors[i]), False: float(trait_errors[i])}
+        }
+    return probabilities, errors, dict(zip(people, ess.tolist()))
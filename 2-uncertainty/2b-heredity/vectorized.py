@@ -0,0 +1,116 @@
+import numpy as np
+
+from model import GENES
+
+BATCH = 1 << 16
+
+
+def encode(people):
+    """
+    Return the family of `people` as integer arrays: the indices of people
+    without parents, the indices of people with parents with those of their
+    mothers and fathers, and each person's known trait (1 or 0, or -1 if
+    unknown).
+    """
+    index = {name: i for i, name in enumerate(people)}
+    founders = [index[name] for name in people if people[name]["mother"] is None]
+    children = [index[name] for name in people if people[name]["mother"] is not None]
+    mothers = [index[people[name]["mother"]] for name in people if people[name]["mother"] is not None]
+    fathers = [index[people[name]["father"]] for name in people if people[name]["mother"] is not None]
+    evidence = [-1 if person["trait"] is None else int(person["trait"]) for person in people.values()]
+    return (
+        np.array(founders, dtype=np.intp),
+        np.array(children, dtype=np.intp),
+        np.array(mothers, dtype=np.intp),
+        np.array(fathers, dtype=np.intp),
+        np.array(evidence, dtype=np.int8)
+    )
+
+
+def log_gene_probabilities(model, family, genes):
+    """
+    Return, for every row of `genes` (each person's number of copies of the
+    gene), the log probability of those gene counts under `model`.
+    """
+    founders, children, mothers, fathers, _ = family
+    return (
+        model.log_prior[genes[:, founders]].sum(axis=1)
+        + model.log_inheritance[genes[:, mothers], genes[:, fathers], genes[:, children]].sum(axis=1)
+    )
+
+
+def digits(codes, n):
+    """
+    Return the gene counts encoded by `codes`: person `p` has digit `p` of
+    the code in base 3 copies of the gene.
+    """
+    genes = np.empty((len(codes), n), dtype=np.intp)
+    for p in range(n):
+        codes, genes[:, p] = np.divmod(codes, 3)
+    return genes
+
+
+def infer(people, model, batch=BATCH):
+    """
+    Return the gene and trait probabilities for each person under `model`
+    (a model.Model), in the same form as the `probabilities` dictionary
+    built by heredity.py `main`, by summing the joint probability of every
+    assignment consistent with the known traits, about `batch` assignments
+    at a time.
+
+    Each batch pairs a block of gene assignments with every pattern of
+    unknown traits, so gene counts are decoded and scored once per block
+    and the trait patterns are added by broadcasting.
+    """
+    n = len(people)
+    trait = model.log_trait
+    family = encode(people)
+    evidence = family[-1]
+    known = np.flatnonzero(evidence >= 0)
+    unknown = np.flatnonzero(evidence < 0)
+    patterns = (np.arange(1 << len(unknown))[:, None] >> np.arange(len(unknown))) & 1
+    rows = max(1, batch >> len(unknown))
+
+    # totals are kept scaled by exp(-shift), the largest log probability
+    gene_totals = np.zeros(3 * n)
+    pattern_totals = np.zeros(len(patterns))
+    shift = -np.inf
+    offsets = np.arange(n)
+
+    for start in range(0, 3 ** n, rows):
+        genes = digits(np.arange(start, min(start + rows, 3 ** n), dtype=np.int64), n)
+        base = log_gene_probabilities(model, family, genes) + trait[genes[:, known], evidence[known]].sum(axis=1)
+        logp = np.broadcast_to(base[:, None], (len(genes), len(patterns))).copy()
+        for j, person in enumerate(unknown):
+            logp += trait[genes[:, person]][:, patterns[:, j]]
+
+        largest = logp.max()
+        if largest == -np.inf:
+            continue
+        if largest > shift:
+            scale = np.exp(shift - largest)
+            gene_totals *= scale
+            pattern_totals *= scale
+            shift = largest
+
+        # accumulate every person's share of each assignment in one pass
+        p = np.exp(logp - shift)
+        weights = np.repeat(p.sum(axis=1), n)
+        gene_totals += np.bincount((3 * offsets + genes).ravel(), weights=weights, minlength=3 * n)
+        pattern_totals += p.sum(axis=0)
+
+    if shift == -np.inf:
+        raise ValueError("Evidence is impossible under the model")
+    gene_totals = gene_totals.reshape(n, 3)
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+
+    has_trait = evidence.astype(float)
+    has_trait[unknown] = pattern_totals @ patterns / pattern_totals.sum()
+
+    return {
+        name: {
+            "gene": {g: float(gene_totals[i, g]) for g in reversed(GENES)},
+            "trait": {True: float(has_trait[i]), False: float(1 - has_trait[i])}
+        }
+        for i, name in enumerate(people)
+    }
@@ -3,6 +3,8 @@ class Variable():
     ACROSS = "across"
     DOWN = "down"
 
+    __slots__ = ("i", "j", "direction", "length", "cells", "_hash")
+
     def __init__(self, i, j, direction, length):
         """Create a new variable with starting point, direction, and length."""
         self.i = i
@@ -16,8 +18,11 @@ class Variable():
                  self.j + (k if self.direction == Variable.ACROSS else 0))
             )
 
+        # Variables are used as dictionary keys in every hot loop
+        self._hash = hash((self.i, self.j, self.direction, self.length))
+
     def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
+        return self._hash
 
     def __eq__(self, other):
         return (
@@ -104,30 +109,100 @@ class Crossword():
                             length=length
                         ))
 
-        # Compute overlaps for each word
-        # For any pair of variables v1, v2, their overlap is either:
-        #    None, if the two variables do not overlap; or
+        # Compute overlaps for each word, from the variables through each cell
+        # For any pair of overlapping variables v1, v2, their overlap is
         #    (i, j), where v1's ith character overlaps v2's jth character
+        # Pairs of variables that do not overlap are not included
+        # (variables are visited in grid order, so that everything built from
+        # them is in the same order on every run)
+        order = sorted(self.variables, key=lambda v: (v.i, v.j, v.direction))
+        through = dict()
+        for variable in order:
+            for k, cell in enumerate(variable.cells):
+                through.setdefault(cell, []).append((variable, k))
+
         self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        for entries in through.values():
+            for v1, k1 in entries:
+                for v2, k2 in entries:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (k1, k2)
+
+        # Precompute each variable's neighbors, and each neighbor with the
+        # overlapping positions in both variables
+        self.crossings = {variable: [] for variable in order}
+        for (v1, v2), (k1, k2) in self.overlaps.items():
+            self.crossings[v1].append((v2, k1, k2))
+        self.crossings = {
+            variable: tuple(crossings)
+            for variable, crossings in self.crossings.items()
+        }
+        self._neighbors = {
+            variable: tuple(v for v, _, _ in crossings)
+            for variable, crossings in self.crossings.items()
+        }
 
     def neighbors(self, var):
-        """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        """Given a variable, return tuple of overlapping variables."""
+        return self._neighbors[var]
+
+
+class Vocabulary():
+
+    def __init__(self, words):
+        """
+        Index `words` for use as bitset domains: bit k of a bitset stands
+        for `self.words[k]`, and words are ordered by length, so each length
+        occupies one run of bits.
+        """
+        self.words = sorted(words, key=lambda word: (len(word), word))
+        self.index = {word: k for k, word in enumerate(self.words)}
+        self.every = (1 << len(self.words)) - 1
+
+        # Bitset of the words of each length, of those with each letter at
+        # each position, and the letters found at each position
+        self.lengths = dict()
+        self.letters = dict()
+        self.alphabet = dict()
+        start = 0
+        while start < len(self.words):
+            length = len(self.words[start])
+            stop = start
+            while stop < len(self.words) and len(self.words[stop]) == length:
+                stop += 1
+            self.lengths[length] = ((1 << (stop - start)) - 1) << start
+            for position in range(length):
+                members = dict()
+                for k in range(start, stop):
+                    members.setdefault(self.words[k][position], []).append(k - start)
+                self.alphabet[length, position] = tuple(sorted(members))
+                for letter, offsets in members.items():
+                    self.letters[length, position, letter] = self._bits(offsets, stop - start) << start
+            start = stop
+
+    @staticmethod
+    def _bits(offsets, size):
+        """Return the bitset of `size` bits with the bits at `offsets` set."""
+        array = bytearray((size + 7) // 8)
+        for k in offsets:
+            array[k >> 3] |= 1 << (k & 7)
+        return int.from_bytes(array, "little")
+
+    def mask(self, words):
+        """Return the bitset of `words`."""
+        return self._bits((self.index[word] for word in words), len(self.words))
+
+    def members(self, mask):
+        """Return the list of words in bitset `mask`."""
+        bits = bin(mask)[:1:-1]
+        words = []
+        k = bits.find("1")
+        while k != -1:
+            words.append(self.words[k])
+            k = bits.find("1", k + 1)
+        return words
+
+    @staticmethod
+    def count(mask):
+        """Return the number of words in bitset `mask`."""
+        return bin(mask).count("1")
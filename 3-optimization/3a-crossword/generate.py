@@ -1,21 +1,74 @@
+import argparse
+import random
 import sys
-import copy
+from collections import deque
 
 from crossword import *
 
+# Variable ordering heuristics: fewest remaining values, breaking ties by
+# degree, or fewest remaining values per weight of failed constraints
+HEURISTICS = ["mrv", "domwdeg"]
+
+# Nodes searched before the first restart with dom/wdeg, and the factor the
+# limit grows by on each restart
+RESTART = 100
+GROWTH = 1.5
+
+
+class Restart(Exception):
+    """Raised when a search runs out of nodes and should start over."""
+
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, sample=None, seed=None, heuristic="mrv", restart=RESTART):
         """
         Create new CSP crossword generate.
+        If `sample` is given, domains with more words than that are ordered
+        by least constraining value only in part, by a random sample drawn
+        with a generator seeded by `seed`; by default every word is ordered.
+        Variables are chosen by `heuristic`, one of HEURISTICS; with
+        "domwdeg", the search restarts after `restart` nodes, and then after
+        more each time (None to never restart).
         """
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {heuristic}")
         self.crossword = crossword
+        self.sample = sample
+        self.random = random.Random(seed)
+        self.heuristic = heuristic
+        self.restart = restart
+
+        # Domains are bitsets of words in the vocabulary
+        self.vocabulary = Vocabulary(self.crossword.words)
+        # (in grid order, so that ties are broken the same way on every run)
         self.domains = {
-            var: self.crossword.words.copy()
-            for var in self.crossword.variables
+            var: self.vocabulary.every
+            for var in sorted(self.crossword.variables, key=lambda v: (v.i, v.j, v.direction))
         }
 
+        # Number of words in each variable's domain with each letter at each
+        # position, filled in as needed: variable -> position -> letter -> count
+        self.frequencies = {var: dict() for var in self.crossword.variables}
+
+        # Previous domains, and their letter frequencies, of every change made
+        # while searching, latest last, so changes can be undone to any point
+        self.trail = []
+
+        # Words of the assignment being searched, added and removed by
+        # backtrack as it extends and undoes the assignment
+        self.used = set()
+
+        # Weight of the constraint between each pair of overlapping variables,
+        # raised each time it empties a domain, for dom/wdeg
+        self.weights = {overlap: 1 for overlap in self.crossword.overlaps}
+
+        # Search statistics of the last solve, and the node limit before the
+        # next restart (None for no limit)
+        self.nodes = 0
+        self.restarts = 0
+        self.limit = None
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -89,10 +142,32 @@ class CrosswordCreator():
     def solve(self):
         """
         Enforce node and arc consistency, and then solve the CSP.
+        The number of nodes searched and of restarts are left in
+        `self.nodes` and `self.restarts`.
         """
+        self.nodes = 0
+        self.restarts = 0
+        self.limit = None
+        self.used.clear()
         self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        if not self.ac3():
+            return None
+        self.trail.clear()
+        if self.heuristic != "domwdeg" or self.restart is None:
+            return self.backtrack(dict())
+
+        # restart with a growing node limit, keeping the learned weights, so
+        # early bad choices are revisited while the search stays complete
+        limit = self.restart
+        while True:
+            self.limit = self.nodes + limit
+            try:
+                return self.backtrack(dict())
+            except Restart:
+                self.undo(0)
+                self.used.clear()
+                self.restarts += 1
+                limit = int(limit * GROWTH) + 1
 
     def enforce_node_consistency(self):
         """
@@ -100,19 +175,11 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        # do the deep copy of domains
-        domain_copy = copy.deepcopy(self.domains)
-
-        # iterate through domains copy
-        for variable in domain_copy:
-            # getting the variable length
-            length = variable.length
-            # iterate through words in domain
-            for word in domain_copy[variable]:
-                if len(word) != length:
-                    # if length of the word doesn't fit variable, delete it from
-                    # the original domain (not copy)
-                    self.domains[variable].remove(word)
+        # words are bucketed by length, so keeping the words which fit a
+        # variable is a lookup of the bucket of its length
+        for variable in self.domains:
+            self.domains[variable] &= self.vocabulary.lengths.get(variable.length, 0)
+            self.frequencies[variable] = dict()
 
     def revise(self, x, y):
         """
@@ -123,34 +190,70 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        # getting x and y ovelapping cells, unpack cords to variables
-        xoverlap, yoverlap = self.crossword.overlaps[x, y]
-
-        # make variable describing if revision was made
-        revision_made = False
-
-        # making domains copy
-        domains_copy = copy.deepcopy(self.domains)
-
-        # if overlap occurs
-        if xoverlap:
-            # iterate through words in x's domain
-            for xword in domains_copy[x]:
-                matched_value = False
-                # iterate through words in y's domain
-                for yword in self.domains[y]:
-                    # if x's word and y's word have same letter in overlapping position
-                    if xword[xoverlap] == yword[yoverlap]:
-                        matched_value = True
-                        break   # no need to check rest of y's words for that x
-                if matched_value:
-                    continue   # if x and y was matched, proceed with another x
-                else:
-                    self.domains[x].remove(xword) # no matching y's word to x, removing word from domain
-                    revision_made = True
+        overlap = self.crossword.overlaps.get((x, y))
+        if overlap is None:
+            return False
+        xoverlap, yoverlap = overlap
+
+        # x's words are supported if their overlapping letter is the
+        # overlapping letter of some word left in y's domain
+        letters = self.vocabulary.letters
+        supported = 0
+        for letter in self.vocabulary.alphabet.get((y.length, yoverlap), ()):
+            if self.domains[y] & letters[y.length, yoverlap, letter]:
+                supported |= letters.get((x.length, xoverlap, letter), 0)
+
+        # keep only supported words, returning whether any were removed
+        revised = self.domains[x] & supported
+        if revised == self.domains[x]:
+            return False
+        self.restrict(x, revised)
+        return True
 
-        # return bolean if revision was made
-        return revision_made
+    def restrict(self, variable, domain):
+        """
+        Replace the domain of `variable` with `domain`, recording the old
+        domain and its letter frequencies on the trail.
+        """
+        frequencies = self.frequencies[variable]
+        removed = self.domains[variable] & ~domain
+        self.trail.append((variable, self.domains[variable], frequencies))
+        self.domains[variable] = domain
+
+        # a single word removed (as by an assignment elsewhere) is taken off
+        # the counts; otherwise they are counted again when next needed
+        if removed and not removed & (removed - 1):
+            word = self.vocabulary.words[removed.bit_length() - 1]
+            frequencies = {position: counts.copy() for position, counts in frequencies.items()}
+            for position, counts in frequencies.items():
+                counts[word[position]] -= 1
+            self.frequencies[variable] = frequencies
+        elif removed:
+            self.frequencies[variable] = dict()
+
+    def undo(self, mark):
+        """
+        Undo every domain change made since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            variable, domain, frequencies = self.trail.pop()
+            self.domains[variable] = domain
+            self.frequencies[variable] = frequencies
+
+    def letter_counts(self, variable, position):
+        """
+        Return a dictionary mapping each letter to the number of words in
+        the domain of `variable` with that letter at `position`.
+        """
+        frequencies = self.frequencies[variable]
+        if position not in frequencies:
+            domain = self.domains[variable]
+            letters = self.vocabulary.letters
+            frequencies[position] = {
+                letter: self.vocabulary.count(domain & letters[variable.length, position, letter])
+                for letter in self.vocabulary.alphabet.get((variable.length, position), ())
+            }
+        return frequencies[position]
 
     def ac3(self, arcs=None):
         """
@@ -161,24 +264,63 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
-        if not arcs:
+        if arcs is None:
             # no arcs provided, start with an initial queue of all of the arcs in the problem
-            queue = []
-            # populating queue
-            for variable1 in self.domains:
-                for variable2 in self.crossword.neighbors(variable1):
-                    if self.crossword.overlaps[variable1, variable2] is not None:
-                        queue.append((variable1, variable2))
-
-        while len(queue) > 0:
-            x, y = queue.pop(0)
+            arcs = [
+                (variable1, variable2)
+                for variable1 in self.domains
+                for variable2 in self.crossword.neighbors(variable1)
+            ]
+
+        # queue of arcs to revise, each queued at most once at a time
+        queue = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queue.append(arc)
+                queued.add(arc)
+
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            x, y = arc
             if self.revise(x, y):
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
+                    self.weights[x, y] += 1
+                    self.weights[y, x] += 1
                     return False
                 for neighbour in self.crossword.neighbors(x):
-                    if neighbour != y:
+                    if neighbour != y and (neighbour, x) not in queued:
                         queue.append((neighbour, x))
-            return True
+                        queued.add((neighbour, x))
+        return True
+
+    def infer(self, variable, value, assignment):
+        """
+        Maintain arc consistency after assigning `value` to `variable`: its
+        domain becomes just `value`, which is removed from the domains of the
+        other unassigned variables (words are distinct), and arc consistency
+        is restored around every changed domain. Changes are recorded on the
+        trail.
+
+        Return False if some domain ends up empty; True otherwise.
+        """
+        bit = 1 << self.vocabulary.index[value]
+        self.restrict(variable, bit)
+        changed = [variable]
+        for other in self.domains:
+            if other != variable and other not in assignment and self.domains[other] & bit:
+                self.restrict(other, self.domains[other] & ~bit)
+                if not self.domains[other]:
+                    return False
+                changed.append(other)
+
+        return self.ac3([
+            (neighbour, other)
+            for other in changed
+            for neighbour in self.crossword.neighbors(other)
+            if neighbour not in assignment
+        ])
 
     def assignment_complete(self, assignment):
         """
@@ -219,40 +361,55 @@ class CrosswordCreator():
         # all cases checked, no conflicts, can return True
         return True
 
+    def fits(self, variable, value, assignment):
+        """
+        Return True if assigning `value` to `variable` keeps the consistent
+        `assignment` consistent: `value` is the right length, is not already
+        used, and agrees with every assigned neighbour where they overlap.
+        Only `variable` is checked, so this is much cheaper than
+        `consistent`.
+        """
+        if len(value) != variable.length or value in self.used:
+            return False
+        for neighbour, x, y in self.crossword.crossings[variable]:
+            if neighbour in assignment and value[x] != assignment[neighbour][y]:
+                return False
+        return True
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
         the number of values they rule out for neighboring variables.
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
+        If `self.sample` is set, larger domains have only a random sample of
+        their words ordered, followed by the rest, which is cheaper but only
+        approximately least constraining.
         """
-        # make temporary dict for holding values
-        word_dict = {}
-
-        # getting neighbours of var
-        neighbours = self.crossword.neighbors(var)
-
-        # iterating through var's words
-        for word in self.domains[var]:
-            eliminated = 0
-            for neighbour in neighbours:
-                # don't count if neighbor has already assigned value
-                if neighbour in assignment:
-                    continue
-                else:
-                    # calculate overlap between two variables
-                    xoverlap, yoverlap = self.crossword.overlaps[var, neighbour]
-                    for neighbour_word in self.domains[neighbour]:
-                        # iterate through neighbour's words, check for eliminate ones
-                        if word[xoverlap] != neighbour_word[yoverlap]:
-                            eliminated += 1
-            # add eliminated neighbour's words to temporary dict
-            word_dict[word] = eliminated
-
-        # sort variables dictionary by number of eliminated neighbour values
-        sorted_dict = {k: v for k, v in sorted(word_dict.items(), key=lambda item: item[1])}
-
-        return [*sorted_dict]
+        words = self.vocabulary.members(self.domains[var])
+
+        # a word rules out the words of each unassigned neighbour without its
+        # letter where they overlap, so the fewest ruled out are the most kept
+        crossings = [
+            (x, self.letter_counts(neighbour, y))
+            for neighbour, x, y in self.crossword.crossings[var]
+            if neighbour not in assignment
+        ]
+        if not crossings:
+            return words
+
+        def kept(word):
+            return sum(counts.get(word[x], 0) for x, counts in crossings)
+
+        # order a random sample of very large domains, then the other words
+        if self.sample is not None and len(words) > self.sample:
+            sampled = self.random.sample(words, self.sample)
+            chosen = set(sampled)
+            return (
+                sorted(sampled, key=kept, reverse=True)
+                + [word for word in words if word not in chosen]
+            )
+        return sorted(words, key=kept, reverse=True)
 
     def select_unassigned_variable(self, assignment):
         """
@@ -261,22 +418,33 @@ class CrosswordCreator():
         in its domain. If there is a tie, choose the variable with the highest
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
-        """
-
-        choice_dict = {}
 
-        # iterating through variables in domains
+        With the "domwdeg" heuristic, choose instead the variable with the
+        fewest remaining values per total weight of its constraints with
+        unassigned variables, where weights count the domains they emptied.
+        """
+        count = self.vocabulary.count
+        best = None
+        best_key = None
         for variable in self.domains:
-            # iterating through variables in assignment
-            if variable not in assignment:
-                # if variable is not yet in assigment, add it to temp dict
-                choice_dict[variable] = self.domains[variable]
-
-        # make list of variables sorted by number of remaining values
-        sorted_list = [v for v, k in sorted(choice_dict.items(), key=lambda item:len(item[1]))]
-
-        # return variable with the minimum number of remaining values
-        return sorted_list[0]
+            if variable in assignment:
+                continue
+            remaining = count(self.domains[variable])
+            if self.heuristic == "domwdeg":
+                # fewest values per weight of the constraints with unassigned
+                # variables, then fewest values
+                weight = sum(
+                    self.weights[variable, neighbour]
+                    for neighbour in self.crossword.neighbors(variable)
+                    if neighbour not in assignment
+                )
+                key = (remaining / weight if weight else float("inf"), remaining)
+            else:
+                # fewest values, then most neighbours
+                key = (remaining, -len(self.crossword.neighbors(variable)))
+            if best is None or key < best_key:
+                best, best_key = variable, key
+        return best
 
     def backtrack(self, assignment):
         """
@@ -291,44 +459,72 @@ class CrosswordCreator():
         if len(assignment) == len(self.domains):
             return assignment
 
+        # count the node, starting over once past the node limit
+        self.nodes += 1
+        if self.limit is not None and self.nodes > self.limit:
+            raise Restart
+
         # selecting one of unassigned variables
         variable = self.select_unassigned_variable(assignment)
 
-        # iterating through words in that variable
-        for value in self.domains[variable]:
-            # making assignment copy, with updated variable value
-            assignment_copy = assignment.copy()
-            assignment_copy[variable] = value
-            # checking for consistency, getting result of that new assignment backtrack
-            if self.consistent(assignment_copy):
-                result = self.backtrack(assignment_copy)
+        # iterating through words in that variable, least constraining first
+        for value in self.order_domain_values(variable, assignment):
+            # checking only the new variable for consistency
+            if not self.fits(variable, value, assignment):
+                continue
+
+            # assigning in place, and keeping arc consistency of the
+            # remaining variables, before getting result of that new
+            # assignment backtrack
+            assignment[variable] = value
+            self.used.add(value)
+            mark = len(self.trail)
+            if self.infer(variable, value, assignment):
+                result = self.backtrack(assignment)
                 if result is not None:
                     return result
+
+            # undo the assignment and the domain changes of this value
+            self.undo(mark)
+            self.used.discard(value)
+            del assignment[variable]
         return None
 
 
 def main():
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
-
-    # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(description="Generate a crossword puzzle.")
+    parser.add_argument("structure", help="file of the crossword structure")
+    parser.add_argument("words", help="file of the words to fill it with")
+    parser.add_argument("output", nargs="?", help="image file to save the crossword to")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="mrv",
+                        help="variable ordering heuristic")
+    parser.add_argument("--restart", type=int, default=RESTART,
+                        help="nodes searched before the first restart with domwdeg (0 to never restart)")
+    parser.add_argument("--sample", type=int, default=None,
+                        help="order larger domains by a random sample of this many words (all words if omitted)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed of the sampled ordering")
+    args = parser.parse_args()
 
     # Generate crossword
-    crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
+    crossword = Crossword(args.structure, args.words)
+    creator = CrosswordCreator(
+        crossword,
+        sample=args.sample,
+        seed=args.seed,
+        heuristic=args.heuristic,
+        restart=args.restart or None
+    )
     assignment = creator.solve()
+    print(f"Nodes: {creator.nodes}, restarts: {creator.restarts}", file=sys.stderr)
 
     # Print result
     if assignment is None:
         print("No solution.")
     else:
         creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+        if args.output:
+            creator.save(assignment, args.output)
 
 
 if __name__ == "__main__":